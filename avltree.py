@@ -105,16 +105,16 @@ class AVLTree:
 
     def _insert(self, value, cur_node):
         if value < cur_node.value:
-            if mg.mut("INSERT_NO_NULL_CHECK", lambda: cur_node.left_child is None, lambda: True):
+            if mg.select("INSERT_NO_NULL_CHECK", cur_node.left_child is None, True):
                 cur_node.left_child = Node(value)
-                cur_node.left_child.parent = mg.mut("INSERT_PARENT_NOT_UPDATED", lambda: cur_node, lambda: cur_node.left_child.parent) # set parent
+                cur_node.left_child.parent = mg.select("INSERT_PARENT_NOT_UPDATED", cur_node, cur_node.left_child.parent) # set parent
                 self._inspect_insertion(cur_node.left_child)
             else:
                 self._insert(value, cur_node.left_child)
         elif value > cur_node.value:
-            if mg.mut("INSERT_NO_NULL_CHECK", lambda: cur_node.right_child is None, lambda: True):
+            if mg.select("INSERT_NO_NULL_CHECK", cur_node.right_child is None, True):
                 cur_node.right_child = Node(value)
-                cur_node.right_child.parent = mg.mut("INSERT_PARENT_NOT_UPDATED", lambda: cur_node, lambda: cur_node.right_child.parent) # set parent
+                cur_node.right_child.parent = mg.select("INSERT_PARENT_NOT_UPDATED", cur_node, cur_node.right_child.parent) # set parent
                 self._inspect_insertion(cur_node.right_child)
             else:
                 self._insert(value, cur_node.right_child)
@@ -174,8 +174,8 @@ class AVLTree:
         # returns the node with min value in tree rooted at input node
         def min_value_node(n):
             current = n
-            while mg.mut("DELETE_FLIP_MIN_VALUE", lambda: current.left_child, lambda: current.right_child) is not None:
-                current = mg.mut("DELETE_FLIP_MIN_VALUE", lambda: current.left_child, lambda: current.right_child)
+            while mg.select("DELETE_FLIP_MIN_VALUE", current.left_child, current.right_child) is not None:
+                current = mg.select("DELETE_FLIP_MIN_VALUE", current.left_child, current.right_child)
             return current
 
         # returns the number of children for the specified node
@@ -225,12 +225,12 @@ class AVLTree:
                 self.root = child
 
             # correct the parent pointer in node
-            child.parent = mg.mut("DELETE_CASE_2_NO_PARENT_UPDATE", lambda: node_parent, lambda: child.parent)
+            child.parent = mg.select("DELETE_CASE_2_NO_PARENT_UPDATE", node_parent, child.parent)
 
         # CASE 3 (node has two children)
         if node_children == 2:
             # get the inorder successor of the deleted node
-            successor = min_value_node(mg.mut("DELETE_CASE_3_FLIP_SUCCESSOR", lambda: node.right_child, lambda: node.left_child))
+            successor = min_value_node(mg.select("DELETE_CASE_3_FLIP_SUCCESSOR", node.right_child, node.left_child))
 
             # copy the inorder successor's value to the node formerly
             # holding the value we wished to delete
@@ -245,7 +245,7 @@ class AVLTree:
 
         if node_parent is not None:
             # fix the height of the parent of current node
-            node_parent.height = mg.mut("DELETE_HEIGHT_MINUS_1", lambda: 1, lambda: 0) + max(self.get_height(node_parent.left_child),
+            node_parent.height = mg.select("DELETE_HEIGHT_MINUS_1", 1, 0) + max(self.get_height(node_parent.left_child),
                                          self.get_height(node_parent.right_child))
 
             # begin to traverse back up the tree checking if there are
@@ -261,9 +261,9 @@ class AVLTree:
     def _search(self, value, cur_node):
         if value == cur_node.value:
             return True
-        elif mg.mut("SEARCH_NO_NULL_CHECK", lambda: value < cur_node.value and cur_node.left_child is not None, lambda: value < cur_node.value):
+        elif mg.select("SEARCH_NO_NULL_CHECK", value < cur_node.value and cur_node.left_child is not None, value < cur_node.value):
             return self._search(value, cur_node.left_child)
-        elif mg.mut("SEARCH_NO_NULL_CHECK", lambda: value > cur_node.value and cur_node.right_child is not None, lambda: value > cur_node.value):
+        elif mg.select("SEARCH_NO_NULL_CHECK", value > cur_node.value and cur_node.right_child is not None, value > cur_node.value):
             return self._search(value, cur_node.right_child)
         return False
 
@@ -281,7 +281,7 @@ class AVLTree:
             self._rebalance_node(path[0], path[1], path[2])
             return
 
-        new_height = mg.mut("INSPECT_INSERTION_HEIGHT_MINUS_1", lambda: 1, lambda: 0) + cur_node.height
+        new_height = mg.select("INSPECT_INSERTION_HEIGHT_MINUS_1", 1, 0) + cur_node.height
         if new_height > cur_node.parent.height:
             cur_node.parent.height = new_height
 
@@ -293,12 +293,12 @@ class AVLTree:
         left_height = self.get_height(cur_node.left_child)
         right_height = self.get_height(cur_node.right_child)
 
-        if mg.mut("INSPECT_DELETE_NO_ABS", lambda: abs(left_height - right_height), lambda: left_height - right_height)  > 1:
+        if mg.select("INSPECT_DELETE_NO_ABS", abs(left_height - right_height), left_height - right_height)  > 1:
             y = self.taller_child(cur_node)
             x = self.taller_child(y)
             self._rebalance_node(cur_node,
-                                 mg.mut("INSPECT_DELETE_FLIP_ARGS", lambda: y, lambda: x),
-                                 mg.mut("INSPECT_DELETE_FLIP_ARGS", lambda: x, lambda: y)
+                                 mg.select("INSPECT_DELETE_FLIP_ARGS", y, x),
+                                 mg.select("INSPECT_DELETE_FLIP_ARGS", x, y)
                                  )
 
         self._inspect_deletion(cur_node.parent)
@@ -307,13 +307,13 @@ class AVLTree:
         if y == z.left_child and x == y.left_child:
             self._right_rotate(z)
         elif y == z.left_child and x == y.right_child:
-            self._left_rotate(mg.mut("REBALANCE_FLIP_MUTANT_1", lambda: y, lambda: z))
-            self._right_rotate(mg.mut("REBALANCE_FLIP_MUTANT_1", lambda: z, lambda: y))
+            self._left_rotate(mg.select("REBALANCE_FLIP_MUTANT_1", y, z))
+            self._right_rotate(mg.select("REBALANCE_FLIP_MUTANT_1", z, y))
         elif y == z.right_child and x == y.right_child:
             self._left_rotate(z)
         elif y == z.right_child and x == y.left_child:
-            self._right_rotate(mg.mut("REBALANCE_FLIP_MUTANT_2", lambda: y, lambda: z))
-            self._left_rotate(mg.mut("REBALANCE_FLIP_MUTANT_2", lambda: z, lambda: y))
+            self._right_rotate(mg.select("REBALANCE_FLIP_MUTANT_2", y, z))
+            self._left_rotate(mg.select("REBALANCE_FLIP_MUTANT_2", z, y))
         else:
             raise Exception('_rebalance_node: z,y,x node configuration not recognized!')
 
@@ -333,7 +333,7 @@ class AVLTree:
                 y.parent.left_child = y
             else:
                 y.parent.right_child = y
-        z.height = mg.mut("ROTATE_RIGHT_Z_HEIGHT_MINUS_1", lambda: 1, lambda: 0) + max(self.get_height(z.left_child),
+        z.height = mg.select("ROTATE_RIGHT_Z_HEIGHT_MINUS_1", 1, 0) + max(self.get_height(z.left_child),
                            self.get_height(z.right_child))
         y.height = 1 + max(self.get_height(y.left_child),
                            self.get_height(y.right_child))
@@ -343,7 +343,7 @@ class AVLTree:
         y = z.right_child
         t2 = y.left_child
         y.left_child = z
-        z.parent = mg.mut("ROTATE_LEFT_NO_PARENT_UPDATE", lambda: y, lambda: z.parent)
+        z.parent = mg.select("ROTATE_LEFT_NO_PARENT_UPDATE", y, z.parent)
         z.right_child = t2
         if t2 is not None: t2.parent = z
         y.parent = sub_root
@@ -356,7 +356,7 @@ class AVLTree:
                 y.parent.right_child = y
         z.height = 1 + max(self.get_height(z.left_child),
                            self.get_height(z.right_child))
-        y.height = mg.mut("ROTATE_LEFT_Y_HEIGHT_MINUS_1", lambda: 1, lambda: 0) + max(self.get_height(y.left_child),
+        y.height = mg.select("ROTATE_LEFT_Y_HEIGHT_MINUS_1", 1, 0) + max(self.get_height(y.left_child),
                            self.get_height(y.right_child))
 
     def get_height(self, cur_node):
@@ -369,6 +369,8 @@ class AVLTree:
         return cur_node.left_child if left >= right else cur_node.right_child
 
 testing_strategy = st.lists(st.integers(), unique=True)
+# testing_function removes elements from the list it is given
+testing_mutates_input = True
 def testing_function(list):
     # print(list)
     flag = True
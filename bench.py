@@ -0,0 +1,292 @@
+# micro-benchmarks for the runner
+# usage: python bench.py <benchmark> [modname], e.g. `python bench.py generate_module toml`
+import ast
+import itertools
+import random
+import sys
+import timeit
+from os import path
+
+import corpus
+import json
+import new_runner
+import plyvel
+import results
+from new_mutagen import Mutagen
+
+
+def report(name, number, seconds):
+    print(f"{name}: {seconds / number * 1000:.3f}ms per call ({number} calls)")
+
+
+# module instantiation cost when the source is read and exec'd every time (the old generate_module)
+# versus exec'ing the cached code object
+def bench_generate_module(number=50):
+    file = path.join(path.dirname(path.abspath(__file__)), new_runner.modname + ".py")
+
+    def from_source():
+        with open(file) as f:
+            code = f.read()
+        exec(code, {"mg": Mutagen()})
+
+    def from_cache():
+        new_runner.generate_module(Mutagen())
+
+    from_cache()
+    report("read + exec source", number, timeit.timeit(from_source, number=number))
+    report("exec cached code", number, timeit.timeit(from_cache, number=number))
+
+
+# one full 500-example run with no mutants active, going through mg at every mutant site
+# versus a module with the sites folded away
+def bench_specialize(number=5):
+    dynamic_module = new_runner.generate_module(Mutagen())
+    specialized_module = new_runner.generate_module(Mutagen(), specialize_for=set())
+
+    def run(module):
+        return lambda: new_runner.run_test(module, seed_to_use=1, examples=500)
+
+    report("dynamic module", number, timeit.timeit(run(dynamic_module), number=number))
+    report("specialized module", number, timeit.timeit(run(specialized_module), number=number))
+
+
+# the runner end to end: every double mutant combination of a few seeds through run_seeds, with and without
+# specialize (including building each combination's specialized module in the workers)
+def bench_specialize_runner(nseeds=3, nthreads=4):
+    combos = [sorted(x) for x in itertools.combinations(new_runner.generate_module(Mutagen()).mg.all_mutants, 2)]
+    test_settings = {"phase": new_runner.without_shrink, "examples": 500}
+
+    def ignore(*args):
+        pass
+
+    for specialize in (True, False):
+        new_runner.specialize = specialize
+        pool = new_runner.start_pool(nthreads, test_settings)
+        seconds = timeit.timeit(
+            lambda: new_runner.run_seeds(pool, {x: combos for x in range(1, nseeds + 1)}, ignore, ignore, ignore),
+            number=1,
+        )
+        new_runner.stop_pool(pool)
+        print(f"specialize={specialize}: {seconds:.2f}s for {nseeds} seeds of {len(combos)} combinations")
+
+
+class SetMutagen(Mutagen):
+    """ Mutagen with the old set-of-strings current_mutants, for comparison """
+
+    @property
+    def current_mutants(self):
+        return self.current_set
+
+    @current_mutants.setter
+    def current_mutants(self, mutants):
+        self.current_set = set(mutants)
+
+    def active_mutant(self, mutation):
+        return mutation in self.current_set
+
+    def mut(self, mutation, good, bad):
+        if self.active_mutant(mutation):
+            return bad()
+        else:
+            return good()
+
+    def select(self, mutation, good, bad):
+        if self.active_mutant(mutation):
+            return bad
+        else:
+            return good
+
+
+# the btree add/remove testing function on fixed inputs with no mutants active,
+# using the set-based and the bitmask-based current_mutants
+def bench_mutagen(number=2000):
+    rng = random.Random(0)
+    inputs = [rng.sample(range(-1000, 1000), rng.randrange(50)) for _ in range(number)]
+    new_runner.modname = "btree"
+    module = new_runner.generate_module(Mutagen())
+    for (name, mg) in (("set", SetMutagen()), ("bitmask", module.mg)):
+        # btree.py makes its own Mutagen, so swap it out underneath the module's functions
+        mg.mutant_bits = dict(module.mg.mutant_bits)
+        mg.current_mutants = set()
+        module.testing_function.__globals__["mg"] = mg
+
+        def run():
+            for lst in inputs:
+                module.testing_function(list(lst))
+
+        report(name, number, timeit.timeit(run, number=1))
+
+
+class SelectToMut(ast.NodeTransformer):
+    """ Turns mg.select(name, a, b) back into the closure form mg.mut(name, lambda: a, lambda: b) """
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        func = node.func
+        if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id == "mg" and func.attr == "select":
+            func.attr = "mut"
+            node.args[1:] = [
+                ast.Lambda(ast.arguments([], [], None, [], [], None, []), x) for x in node.args[1:]
+            ]
+        return node
+
+
+# tests per second of the btree and avltree testing functions on fixed inputs with no mutants active,
+# with their mutant sites written with mg.select versus the old mg.mut closures
+def bench_select(number=2000):
+    rng = random.Random(0)
+    inputs = [rng.sample(range(-1000, 1000), rng.randrange(50)) for _ in range(number)]
+    for modname in ("btree", "avltree"):
+        file = path.join(path.dirname(path.abspath(__file__)), modname + ".py")
+        with open(file) as f:
+            tree = ast.parse(f.read(), file)
+        mut_code = compile(ast.fix_missing_locations(SelectToMut().visit(tree)), file, "exec")
+        new_runner.modname = modname
+        select_module = new_runner.generate_module(Mutagen())
+        mut_module = {"mg": Mutagen()}
+        exec(mut_code, mut_module)
+        for (name, testing_function) in (("mg.mut", mut_module["testing_function"]), ("mg.select", select_module.testing_function)):
+
+            def run():
+                for lst in inputs:
+                    testing_function(list(lst))
+
+            seconds = timeit.timeit(run, number=1)
+            print(f"{modname} with {name}: {number / seconds:.0f} tests/s")
+
+
+# reading every seed of a store (data/<modname>_<ncombos>_<shrink>_ldb as set in new_runner) from its binary records,
+# as dicts and as bare masks, versus json.loads of the same seeds as the old one-record-per-seed json values
+def bench_results():
+    filename = f"data/{new_runner.modname}_{new_runner.names.get(new_runner.ncombos, 'x' + str(new_runner.ncombos))}_{('unshrunk', 'shrunk')[new_runner.to_shrink]}_ldb"
+    db = plyvel.DB(filename, create_if_missing=False)
+    seeds = results.stored_seeds(db)
+    legacy = [json.dumps(results.read_seed(db, x)).encode("utf8") for x in seeds]
+    binary_size = sum(len(k) + len(v) for (k, v) in db)
+    print(f"{filename}: {len(seeds)} seeds, {sum(map(len, legacy))} bytes as json, {binary_size} bytes as binary records")
+    report("json.loads per seed", len(seeds), timeit.timeit(lambda: [json.loads(x) for x in legacy], number=1))
+    report("read_seed per seed", len(seeds), timeit.timeit(lambda: [results.read_seed(db, x, with_inputs=False) for x in seeds], number=1))
+    table = results.mutant_table(db)
+
+    def decode_masks():
+        for x in seeds:
+            for (mask, record) in results.iter_records(db, x):
+                results.decode_record(table, record)
+
+    report("decode_record per seed (masks, no dicts)", len(seeds), timeit.timeit(decode_masks, number=1))
+    db.close()
+
+
+# a 500-example run with no mutants active through hypothesis versus replaying the same seed's stored corpus,
+# plus what generating and storing the corpus costs once per seed
+def bench_corpus(number=5):
+    module = new_runner.generate_module(Mutagen())
+    # generate_corpus draws from default_module, which was built for new_runner's own modname
+    new_runner.default_module = module
+    directory = new_runner.module_corpus_dir(500)
+    report("generate corpus", number, timeit.timeit(lambda: new_runner.generate_corpus(directory, 1, 500), number=number))
+    examples = new_runner.load_corpus(directory, 1)
+    assert new_runner.run_test(module, seed_to_use=1, examples=500)[1] == new_runner.replay_corpus(module, examples)[1]
+    report("hypothesis run", number, timeit.timeit(lambda: new_runner.run_test(module, seed_to_use=1, examples=500), number=number))
+    report("corpus replay", number, timeit.timeit(lambda: new_runner.replay_corpus(module, examples), number=number))
+
+
+# replaying seed 1's corpus for every double mutant combination one combination after another
+# versus example-major, with every combination that hasn't failed yet run on each example in turn
+def bench_example_major(number=3):
+    module = new_runner.generate_module(Mutagen())
+    new_runner.default_module = module
+    directory = new_runner.module_corpus_dir(500)
+    if not corpus.has_corpus(directory, 1):
+        new_runner.generate_corpus(directory, 1, 500)
+    examples = new_runner.load_corpus(directory, 1)
+    jobs = [set(x) for x in itertools.combinations(sorted(module.mg.all_mutants), 2)]
+
+    def combination_major():
+        return [new_runner.replay_corpus(new_runner.job_module(module, job), examples) for job in jobs]
+
+    def example_major():
+        return new_runner.run_example_major(module, jobs, examples)
+
+    assert [x[1] for x in combination_major()] == [x[1] for x in example_major()]
+    report(f"combination-major ({len(jobs)} combinations)", number, timeit.timeit(combination_major, number=number))
+    report(f"example-major ({len(jobs)} combinations)", number, timeit.timeit(example_major, number=number))
+
+
+# replaying seed 1's corpus for every double mutant combination, running every example versus skipping the ones
+# that reach none of the combination's mutants (including the one traced unmutated pass that needs)
+def bench_skip_unreached(number=3):
+    module = new_runner.generate_module(Mutagen())
+    new_runner.default_module = module
+    directory = new_runner.module_corpus_dir(500)
+    if not corpus.has_corpus(directory, 1):
+        new_runner.generate_corpus(directory, 1, 500)
+    examples = new_runner.load_corpus(directory, 1)
+    jobs = [set(x) for x in itertools.combinations(sorted(module.mg.all_mutants), 2)]
+
+    def run_all():
+        return [new_runner.replay_corpus(new_runner.job_module(module, job), examples) for job in jobs]
+
+    def skip_unreached():
+        new_runner.corpus_reachability.cache_clear()
+        reached = new_runner.corpus_reachability(directory, 1)
+        return [
+            new_runner.replay_corpus(new_runner.job_module(module, job), examples, reached, new_runner.tracing_mask(job))
+            for job in jobs
+        ]
+
+    assert [x[1] for x in run_all()] == [x[1] for x in skip_unreached()]
+    report(f"every example ({len(jobs)} combinations)", number, timeit.timeit(run_all, number=number))
+    report(f"skipping unreached ({len(jobs)} combinations)", number, timeit.timeit(skip_unreached, number=number))
+
+
+# running the single mutant combinations of a few seeds with a new worker pool started for each seed (what the
+# runner did before it kept one pool for the whole run) versus one pool started once and reused for every seed
+def bench_pool(nseeds=5, nthreads=4):
+    combos = [sorted(x) for x in itertools.combinations(new_runner.generate_module(Mutagen()).mg.all_mutants, 1)]
+    test_settings = {"phase": new_runner.without_shrink, "examples": 500}
+
+    def ignore(*args):
+        pass
+
+    def pool_per_seed():
+        startup = 0.0
+        for seed_to_use in range(1, nseeds + 1):
+            pool = new_runner.start_pool(nthreads, test_settings)
+            new_runner.run_seeds(pool, {seed_to_use: combos}, ignore, ignore, ignore)
+            new_runner.stop_pool(pool)
+            startup += pool.startup_time
+        return startup
+
+    def one_pool():
+        pool = new_runner.start_pool(nthreads, test_settings)
+        new_runner.run_seeds(pool, {x: combos for x in range(1, nseeds + 1)}, ignore, ignore, ignore)
+        new_runner.stop_pool(pool)
+        return pool.startup_time
+
+    for (name, run) in (("pool per seed", pool_per_seed), ("one pool", one_pool)):
+        startup = []
+        seconds = timeit.timeit(lambda: startup.append(run()), number=1)
+        print(f"{name}: {seconds:.2f}s for {nseeds} seeds of {len(combos)} combinations, {startup[0]:.2f}s of it starting workers")
+
+
+benchmarks = {
+    "generate_module": bench_generate_module,
+    "specialize": bench_specialize,
+    "specialize_runner": bench_specialize_runner,
+    "mutagen": bench_mutagen,
+    "select": bench_select,
+    "results": bench_results,
+    "corpus": bench_corpus,
+    "example_major": bench_example_major,
+    "skip_unreached": bench_skip_unreached,
+    "pool": bench_pool,
+}
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in benchmarks:
+        print(f"usage: python {sys.argv[0]} <{'|'.join(benchmarks)}> [modname]")
+        sys.exit(1)
+    if len(sys.argv) > 2:
+        new_runner.modname = sys.argv[2]
+    benchmarks[sys.argv[1]]()
@@ -159,24 +159,24 @@ class BTreeSet:
         while True:
             # Search for index in current node
             assert len(node.keys) < self.maxkeys
-            assert node is root or mg.mut("ADD_GT_RPL_GTE", lambda: len(node.keys) >= self.minkeys, lambda: len(node.keys) > self.minkeys)
+            assert node is root or mg.select("ADD_GT_RPL_GTE", len(node.keys) >= self.minkeys, len(node.keys) > self.minkeys)
             found, index = node.search(obj)
             if found:
                 return  # Key already exists in tree
 
             if node.is_leaf():  # Simple insertion into leaf
                 node.keys.insert(index, obj)
-                self.size += mg.mut("ADD_NO_SIZE_UPDATE", lambda: 1, lambda: 0)
+                self.size += mg.select("ADD_NO_SIZE_UPDATE", 1, 0)
                 return  # Successfully added
 
             else:  # Handle internal node
                 child = node.children[index]
                 if len(child.keys) == self.maxkeys:  # Split child node
-                    node.split_child(self.minkeys, self.maxkeys, mg.mut("ADD_NO_SPLIT_INDEX", lambda: index, lambda: 0))
+                    node.split_child(self.minkeys, self.maxkeys, mg.select("ADD_NO_SPLIT_INDEX", index, 0))
                     if obj == node.keys[index]:
                         return  # Key already exists in tree
-                    elif mg.mut("ADD_GTE_RPL_GT", lambda: obj > node.keys[index], lambda: obj >= node.keys[index]):
-                        child = node.children[mg.mut("ADD_CHILD_WRONG_UPDATE", lambda: index + 1, lambda: index)]
+                    elif mg.select("ADD_GTE_RPL_GT", obj > node.keys[index], obj >= node.keys[index]):
+                        child = node.children[mg.select("ADD_CHILD_WRONG_UPDATE", index + 1, index)]
                 node = child
 
     def remove(self, obj):
@@ -193,41 +193,41 @@ class BTreeSet:
         found, index = root.search(obj)
         node = root
         while True:
-            assert mg.mut("REMOVE_GT_RPL_GTE",
-                          lambda: len(node.keys) <= self.maxkeys,
-                          lambda: len(node.keys) < self.maxkeys
-                          )
+            assert mg.select("REMOVE_GT_RPL_GTE",
+                             len(node.keys) <= self.maxkeys,
+                             len(node.keys) < self.maxkeys
+                             )
             assert node is root or len(node.keys) > self.minkeys
             if node.is_leaf():
                 if found:  # Simple removal from leaf
                     node.remove_key(index)
-                    assert mg.mut("REMOVE_NO_SIZE_CHECK", lambda: self.size > 0, lambda: True)
+                    assert mg.select("REMOVE_NO_SIZE_CHECK", self.size > 0, True)
                     self.size -= 1
                 return found
 
             else:  # Internal node
                 if found:  # Key is stored at current node
-                    left, right = node.children[index: mg.mut("REMOVE_LR_WRONG_ASSGN",
-                                                              lambda: index + 2,
-                                                              lambda: index+1
-                                                              )]
+                    left, right = node.children[index: mg.select("REMOVE_LR_WRONG_ASSGN",
+                                                                 index + 2,
+                                                                 index+1
+                                                                 )]
                     if len(left.keys) > self.minkeys:  # Replace key with predecessor
                         node.keys[index] = left.remove_max(self.minkeys)
                         assert self.size > 0
-                        self.size -= mg.mut("REMOVE_NO_SIZE_UPDATE", lambda: 1, lambda: 0)
+                        self.size -= mg.select("REMOVE_NO_SIZE_UPDATE", 1, 0)
                         return True
                     elif len(right.keys) > self.minkeys:
                         node.keys[index] = right.remove_min(self.minkeys)
                         assert self.size > 0
-                        self.size -= mg.mut("REMOVE_NO_SIZE_UPDATE", lambda: 1, lambda: 0)
+                        self.size -= mg.select("REMOVE_NO_SIZE_UPDATE", 1, 0)
                         return True
                     else:  # Merge key and right node into left node, then recurse
                         node.merge_children(self.minkeys, index)
-                        if mg.mut("REMOVE_NO_NODE_ROOT_CMP", lambda: node is root, lambda: True) and len(root.keys) == 0:
+                        if mg.select("REMOVE_NO_NODE_ROOT_CMP", node is root, True) and len(root.keys) == 0:
                             assert len(root.children) == 1
-                            self.root = root = mg.mut("REMOVE_FLIP_DEC_HEIGHT", lambda: left, lambda: right)  # Decrement tree height
+                            self.root = root = mg.select("REMOVE_FLIP_DEC_HEIGHT", left, right)  # Decrement tree height
                         node = left
-                        index = mg.mut("REMOVE_NO_INDEX_UPDATE", lambda: self.minkeys, lambda: index)  # Index known due to merging; no need to search
+                        index = mg.select("REMOVE_NO_INDEX_UPDATE", self.minkeys, index)  # Index known due to merging; no need to search
 
                 else:  # Key might be found in some child
                     child = node.ensure_child_remove(self.minkeys, index)
@@ -292,7 +292,7 @@ class BTreeSet:
 
         # Note: Once created, a node's structure never changes between a leaf and internal node.
         def __init__(self, maxkeys, leaf):
-            assert mg.mut("NODE_INIT_GT_RPL_GTE", lambda: maxkeys >= 3, lambda: maxkeys > 3) and maxkeys % 2 == 1
+            assert mg.select("NODE_INIT_GT_RPL_GTE", maxkeys >= 3, maxkeys > 3) and maxkeys % 2 == 1
             self.keys = []  # Length is in [0, maxkeys] for root node, [minkeys, maxkeys] for all other nodes
             self.children = None if leaf else []  # If internal node, then length always equals len(keys)+1
 
@@ -307,15 +307,15 @@ class BTreeSet:
         def search(self, obj):
             keys = self.keys
             i = 0
-            while mg.mut("NODE_SEARCH_GTE_RPL_GT_1", lambda: i < len(keys), lambda: i <= len(keys)):
+            while mg.select("NODE_SEARCH_GTE_RPL_GT_1", i < len(keys), i <= len(keys)):
                 if obj == keys[i]:
-                    assert mg.mut("NODE_SEARCH_GT_RPL_GTE", lambda: 0 <= i < len(keys), lambda: 0 < i < len(keys))
+                    assert mg.select("NODE_SEARCH_GT_RPL_GTE", 0 <= i < len(keys), 0 < i < len(keys))
                     return (True, i)  # Key found
-                elif mg.mut("NODE_SEARCH_GTE_RPL_GT_2", lambda: obj > keys[i], lambda: obj >= keys[i]):
+                elif mg.select("NODE_SEARCH_GTE_RPL_GT_2", obj > keys[i], obj >= keys[i]):
                     i += 1
                 else:
                     break
-            assert mg.mut("NODE_SEARCH_LT_RPL_LTE", lambda: 0 <= i <= len(keys), lambda: 0 <= i < len(keys))
+            assert mg.select("NODE_SEARCH_LT_RPL_LTE", 0 <= i <= len(keys), 0 <= i < len(keys))
             return (False, i)  # Not found, caller should recurse on child
 
         # -- Methods for insertion --
@@ -327,16 +327,16 @@ class BTreeSet:
             left = self.children[index]
             assert len(left.keys) == maxkeys
             right = BTreeSet.Node(maxkeys, left.is_leaf())
-            self.children.insert(mg.mut("NODE_SPLT_CH_CHILD_INSERT_WRNG", lambda: index + 1, lambda: index), right)
+            self.children.insert(mg.select("NODE_SPLT_CH_CHILD_INSERT_WRNG", index + 1, index), right)
 
             # Handle children
             if not left.is_leaf():
-                right.children.extend(left.children[mg.mut("NODE_SPLT_CH_R_CH_EXT_WRNG", lambda: minkeys + 1, lambda: minkeys) :])
-                del left.children[mg.mut("NODE_SPLT_CH_L_CH_EXT_WRNG", lambda: minkeys + 1, lambda: minkeys) :]
+                right.children.extend(left.children[mg.select("NODE_SPLT_CH_R_CH_EXT_WRNG", minkeys + 1, minkeys) :])
+                del left.children[mg.select("NODE_SPLT_CH_L_CH_EXT_WRNG", minkeys + 1, minkeys) :]
 
             # Handle keys
             self.keys.insert(index, left.keys[minkeys])
-            right.keys.extend(left.keys[mg.mut("NODE_SPLT_CH_R_KEYS_EXT_WRNG", lambda: minkeys + 1, lambda: minkeys) :])
+            right.keys.extend(left.keys[mg.select("NODE_SPLT_CH_R_KEYS_EXT_WRNG", minkeys + 1, minkeys) :])
             del left.keys[minkeys:]
 
         # -- Methods for removal --
@@ -347,15 +347,15 @@ class BTreeSet:
         # A reference to the appropriate child is returned, which is helpful if the old child no longer exists.
         def ensure_child_remove(self, minkeys, index):
             # Preliminaries
-            assert not self.is_leaf() and mg.mut("ECR_GT_RPL_GTE_1", lambda: 0 <= index < len(self.children), lambda: 0 < index < len(self.children))
+            assert not self.is_leaf() and mg.select("ECR_GT_RPL_GTE_1", 0 <= index < len(self.children), 0 < index < len(self.children))
             child = self.children[index]
-            if mg.mut("ECR_GTE_RPL_GT_1", lambda: len(child.keys) > minkeys, lambda: len(child.keys) >= minkeys) :  # Already satisfies the condition
+            if mg.select("ECR_GTE_RPL_GT_1", len(child.keys) > minkeys, len(child.keys) >= minkeys) :  # Already satisfies the condition
                 return child
             assert len(child.keys) == minkeys
 
             # Get siblings
-            left = self.children[mg.mut("ECR_L_SBLNG_WRNG", lambda: index - 1, lambda: index)] if mg.mut("ECR_GT_RPL_GTE_2", lambda: index >= 1, lambda: index > 1) else None
-            right = self.children[mg.mut("ECR_R_SBLNG_WRNG", lambda: index + 1, lambda: index)] if mg.mut("ECR_GTE_RPL_GT_2", lambda: index < len(self.keys), lambda:index <= len(self.keys))  else None
+            left = self.children[mg.select("ECR_L_SBLNG_WRNG", index - 1, index)] if mg.select("ECR_GT_RPL_GTE_2", index >= 1, index > 1) else None
+            right = self.children[mg.select("ECR_R_SBLNG_WRNG", index + 1, index)] if mg.select("ECR_GTE_RPL_GT_2", index < len(self.keys), index <= len(self.keys))  else None
             internal = not child.is_leaf()
             assert left is not None or right is not None  # At least one sibling exists because degree >= 2
             assert left is None or left.is_leaf() != internal  # Sibling must be same type (internal/leaf) as child
@@ -364,8 +364,8 @@ class BTreeSet:
             if left is not None and len(left.keys) > minkeys:  # Steal rightmost item from left sibling
                 if internal:
                     child.children.insert(0, left.children.pop(-1))
-                child.keys.insert(0, self.keys[mg.mut("ECR_CHLD_KEY_INSRT_WRNG", lambda: index - 1, lambda: index)])
-                self.keys[mg.mut("ECR_SELF_KEY_WRNG", lambda: index - 1, lambda: index)] = left.remove_key(len(left.keys) - mg.mut("ECR_L_REMOVE_KEY_WRNG", lambda: 1, lambda: 0))
+                child.keys.insert(0, self.keys[mg.select("ECR_CHLD_KEY_INSRT_WRNG", index - 1, index)])
+                self.keys[mg.select("ECR_SELF_KEY_WRNG", index - 1, index)] = left.remove_key(len(left.keys) - mg.select("ECR_L_REMOVE_KEY_WRNG", 1, 0))
                 return child
             elif right is not None and len(right.keys) > minkeys:  # Steal leftmost item from right sibling
                 if internal:
@@ -374,23 +374,23 @@ class BTreeSet:
                 self.keys[index] = right.remove_key(0)
                 return child
             elif left is not None:  # Merge child into left sibling
-                self.merge_children(minkeys, index - mg.mut("ECR_SELF_MERGE_CH_WRNG", lambda: 1, lambda: 0))
-                return mg.mut("ECR_WRNG_RT_2", lambda: left, lambda: child)  # This is the only case where the return value is different
+                self.merge_children(minkeys, index - mg.select("ECR_SELF_MERGE_CH_WRNG", 1, 0))
+                return mg.select("ECR_WRNG_RT_2", left, child)  # This is the only case where the return value is different
             elif right is not None:  # Merge right sibling into child
                 self.merge_children(minkeys, index)
-                return mg.mut("ECR_WRNG_RT_1", lambda: child, lambda: right)
+                return mg.select("ECR_WRNG_RT_1", child, right)
             else:
                 raise AssertionError("Impossible condition")
 
         # Merges the child node at index+1 into the child node at index,
         # assuming the current node is not empty and both children have minkeys.
         def merge_children(self, minkeys, index):
-            assert not self.is_leaf() and mg.mut("MG_GT_RPL_GTE", lambda: 0 <= index < len(self.keys), lambda: 0 < index < len(self.keys))
-            left, right = self.children[index: mg.mut("MG_L_R_WRNG_ASSGN", lambda: index + 2, lambda: index + 1)]
+            assert not self.is_leaf() and mg.select("MG_GT_RPL_GTE", 0 <= index < len(self.keys), 0 < index < len(self.keys))
+            left, right = self.children[index: mg.select("MG_L_R_WRNG_ASSGN", index + 2, index + 1)]
             assert len(left.keys) == len(right.keys) == minkeys
             if not left.is_leaf():
                 left.children.extend(right.children)
-            del self.children[mg.mut("MG_SELF_CHN_WRNG_IND", lambda: index + 1, lambda: index)]
+            del self.children[mg.select("MG_SELF_CHN_WRNG_IND", index + 1, index)]
             left.keys.append(self.remove_key(index))
             left.keys.extend(right.keys)
 
@@ -412,9 +412,9 @@ class BTreeSet:
             while True:
                 assert len(node.keys) > minkeys
                 if node.is_leaf():
-                    return node.remove_key(len(node.keys) - mg.mut("RMAX_KEYS_LEN_PLUS_1", lambda: 1, lambda: 0))
+                    return node.remove_key(len(node.keys) - mg.select("RMAX_KEYS_LEN_PLUS_1", 1, 0))
                 else:
-                    node = node.ensure_child_remove(minkeys, len(node.children) - mg.mut("RMAX_CH_LEN_PLUS_1", lambda: 1, lambda: 0))
+                    node = node.ensure_child_remove(minkeys, len(node.children) - mg.select("RMAX_CH_LEN_PLUS_1", 1, 0))
 
         # Removes and returns this node's key at the given index.
         def remove_key(self, index):
@@ -460,6 +460,8 @@ class BTreeSet:
             return count
 
 testing_strategy = st.lists(st.integers(), unique=True)
+# testing_function removes elements from the list it is given
+testing_mutates_input = True
 def testing_function(lst):
     flag = True
 
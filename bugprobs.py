@@ -0,0 +1,208 @@
+# per-bugset bug probabilities computed on columnar results (see columns.py)
+#
+# a bugset is a non-empty subset of a run's mutant combination. every row counts once for every bugset of its
+# combination: as a hit with its attempts if the run failed and every mutant of the bugset was a single-mutant
+# triage cause, and otherwise as a miss costing the full number of examples. a bugset's probability is its hits
+# over its total attempts. runs the runner stopped ("timeout" results) have no outcome and aren't counted.
+# with hit_column="causes", every mutant of the bugset only has to be in one of the triage causes, whatever its size
+import hashlib
+import json
+import os
+from os import path
+from types import SimpleNamespace
+
+import numpy as np
+
+import columns
+import results
+
+# what a bugset that wasn't found costs, i.e. the number of examples each run tries
+examples = 500
+# where cached_probs keeps its tables
+cache_dir = "data/prob_cache"
+
+
+def set_bits(masks, nbits):
+    """ (len(masks), nbits) array of the lowest nbits set bits of every mask, lowest first """
+    masks = masks.copy()
+    bits = np.zeros((len(masks), nbits), dtype=np.uint64)
+    for i in range(nbits):
+        bits[:, i] = masks & (~masks + np.uint64(1))
+        masks ^= bits[:, i]
+    return bits
+
+
+def get_probs(data, modname, to_shrink, ncombos=(1, 2, 3), hit_column="singles"):
+    """
+    Hit counts, attempt totals and probabilities of every bugset of a module's runs
+
+    Inputs:
+        * data [namespace] columnar results, from columns.read or columns.load
+        * modname [string] the module to compute them for
+        * to_shrink [bool] use the shrunk or the unshrunk runs
+        * ncombos [iterable] the combination sizes to include
+        * hit_column [string] "singles" to count a hit when every mutant of the bugset is a single-mutant cause,
+          "causes" when every one is in any cause
+
+    Returns a namespace of bugsets (masks in data.mutants[modname]), hits, attempts and probs, sorted by bugset
+    """
+    table = data.mutants[modname]
+    rows = (
+        (data.module == data.modules.index(modname))
+        & (data.shrunk == to_shrink)
+        & np.isin(data.ncombos, list(ncombos))
+        & ~timed_out(data)
+    )
+    failed = np.asarray(data.type == data.types.index("fail"))
+    (bugsets, hits, attempts) = ([], [], [])
+    for k in np.unique(data.ncombos[rows]):
+        group = rows & (data.ncombos == k)
+        bits = set_bits(np.asarray(data.combo[group]), int(k))
+        causes = np.asarray(getattr(data, hit_column)[group])
+        group_failed = failed[group]
+        group_attempts = np.asarray(data.attempts[group], dtype=np.int64)
+        # every non-empty subset of the k mutants of each combination
+        for subset in range(1, 1 << int(k)):
+            bugset = np.bitwise_or.reduce(bits[:, [i for i in range(int(k)) if subset >> i & 1]], axis=1)
+            hit = group_failed & ((bugset & ~causes) == 0)
+            bugsets.append(bugset)
+            hits.append(hit.astype(np.int64))
+            attempts.append(np.where(hit, group_attempts, examples))
+    if len(bugsets) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return SimpleNamespace(bugsets=empty.astype(np.uint64), hits=empty, attempts=empty, probs=empty / 1, mutants=table)
+    (bugsets, inverse) = np.unique(np.concatenate(bugsets), return_inverse=True)
+    # the weights are summed as float64, which is exact for any realistic count
+    hits = np.bincount(inverse, weights=np.concatenate(hits), minlength=len(bugsets)).astype(np.int64)
+    attempts = np.bincount(inverse, weights=np.concatenate(attempts), minlength=len(bugsets)).astype(np.int64)
+    return SimpleNamespace(bugsets=bugsets, hits=hits, attempts=attempts, probs=hits / attempts, mutants=table)
+
+
+def timed_out(data):
+    """ Boolean array, per row, of whether the row is a "timeout" result """
+    if "timeout" not in data.types:
+        return np.zeros(len(data.type), dtype=np.bool_)
+    return np.asarray(data.type == data.types.index("timeout"))
+
+
+def single_causes_only(data):
+    """ Boolean array, per row, of whether every triage cause of the row is a single mutant """
+    triage = np.asarray(data.triage)
+    multi = (triage & (triage - np.uint64(1))) != 0
+    counts = np.asarray(data.triage_count, dtype=np.int64)
+    # causes are stored row after row, so repeating each row index by its number of causes lines up with triage
+    row_of_cause = np.repeat(np.arange(len(counts)), counts)
+    return np.bincount(row_of_cause, weights=multi, minlength=len(counts)) == 0
+
+
+def run_keys(data, rows):
+    """ (ncombos, seed, combination) of the given rows as a sortable structured array """
+    keys = np.zeros(len(rows), dtype=[("ncombos", np.uint8), ("seed", np.uint32), ("combo", np.uint64)])
+    for x in keys.dtype.names:
+        keys[x] = getattr(data, x)[rows]
+    return keys
+
+
+def iter_shrink_ratios(data, modname, probs, ncombos=(1, 2, 3), chunk_size=1 << 16):
+    """
+    For every failing unshrunk run whose causes (in both the unshrunk and the shrunk run) are all single mutants,
+    the probability of the bugset the shrunk run was triaged to over that of the unshrunk one, by probs
+    (np.inf where the unshrunk bugset's probability is 0). Yields them as arrays for up to chunk_size unshrunk
+    runs at a time, so they never all have to be in memory
+
+    Raises an exception if an unshrunk run has no shrunk counterpart or their type or attempts differ. Pairs where
+    either run timed out are left out
+    """
+    table = data.mutants[modname]
+    rows = (data.module == data.modules.index(modname)) & np.isin(data.ncombos, list(ncombos))
+    shrunk_rows = np.flatnonzero(rows & np.asarray(data.shrunk))
+    shrunk_keys = run_keys(data, shrunk_rows)
+    order = np.argsort(shrunk_keys)
+    (shrunk_rows, shrunk_keys) = (shrunk_rows[order], shrunk_keys[order])
+    failed = data.type == data.types.index("fail")
+    timeout = timed_out(data)
+    single = single_causes_only(data)
+
+    # probs may number mutants differently (e.g. when it comes from the cache)
+    known = columns.remap_masks(probs.bugsets, probs.mutants, table)
+    order = np.argsort(known)
+    (known, known_probs) = (known[order], probs.probs[order])
+
+    def lookup(bugsets):
+        index = np.minimum(np.searchsorted(known, bugsets), len(known) - 1)
+        if (known[index] != bugsets).any():
+            raise KeyError(f"{modname}: a triaged bugset has no probability")
+        return known_probs[index]
+
+    all_unshrunk = np.flatnonzero(rows & ~np.asarray(data.shrunk))
+    for start in range(0, len(all_unshrunk), chunk_size):
+        unshrunk = all_unshrunk[start:start + chunk_size]
+        keys = run_keys(data, unshrunk)
+        found = np.minimum(np.searchsorted(shrunk_keys, keys), len(shrunk_keys) - 1)
+        if len(shrunk_keys) == 0 or (shrunk_keys[found] != keys).any():
+            raise KeyError(f"{modname}: some unshrunk runs have no shrunk counterpart")
+        shrunk = shrunk_rows[found]
+        stopped = timeout[unshrunk] | timeout[shrunk]
+        consistent = stopped | (data.type[unshrunk] == data.type[shrunk]) & (~failed[unshrunk] | (data.attempts[unshrunk] == data.attempts[shrunk]))
+        if not consistent.all():
+            i = np.flatnonzero(~consistent)[0]
+            raise Exception(f"unshrunk and shrunk runs differ: seed {data.seed[unshrunk[i]]}, {results.combo_key(results.from_mask(table, int(data.combo[unshrunk[i]])))}")
+        use = ~stopped & failed[unshrunk] & single[unshrunk] & single[shrunk]
+        pre = lookup(np.asarray(data.singles[unshrunk[use]]))
+        post = lookup(np.asarray(data.singles[shrunk[use]]))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            yield np.where(pre == 0, np.inf, post / pre)
+
+
+def shrink_ratios(data, modname, probs, ncombos=(1, 2, 3)):
+    """ All of iter_shrink_ratios's ratios in one array """
+    return np.concatenate([np.zeros(0)] + list(iter_shrink_ratios(data, modname, probs, ncombos)))
+
+
+def to_dict(probs):
+    """ The {frozenset of mutant names: probability} dict analysis.py has always used """
+    return {
+        frozenset(results.from_mask(probs.mutants, int(bugset))): float(prob)
+        for (bugset, prob) in zip(probs.bugsets, probs.probs)
+    }
+
+
+def cached_probs(modname, to_shrink, ncombos=(1, 2, 3), data=None, hit_column="singles"):
+    """
+    get_probs on the module's stores in data/, cached on disk in cache_dir. If data is given (columnar results
+    that include those stores) it is used instead of reading the stores when the table has to be computed
+
+    A cached table is used as long as none of the stores it was computed from have been written to since
+    (see results.store_fingerprint), otherwise the table is computed again and replaces it
+    """
+    stores = [(modname, x, to_shrink, columns.store_path(modname, x, to_shrink)) for x in ncombos]
+    fingerprints = columns.store_fingerprints(stores)
+    params = json.dumps([modname, bool(to_shrink), list(ncombos), sorted(columns.excluded_mutants(modname)), examples, hit_column])
+    key = json.dumps([params, fingerprints])
+    # one file per set of parameters, overwritten whenever its stores change
+    cache_file = path.join(
+        cache_dir,
+        f"{modname}_{('unshrunk', 'shrunk')[to_shrink]}_{hashlib.sha256(params.encode('utf8')).hexdigest()[:16]}.npz",
+    )
+    if path.exists(cache_file):
+        with np.load(cache_file) as cached:
+            if str(cached["key"]) == key:
+                return SimpleNamespace(
+                    bugsets=cached["bugsets"],
+                    hits=cached["hits"],
+                    attempts=cached["attempts"],
+                    probs=cached["probs"],
+                    mutants=json.loads(str(cached["mutants"])),
+                )
+    probs = get_probs(columns.read(stores) if data is None else data, modname, to_shrink, ncombos, hit_column)
+    os.makedirs(cache_dir, exist_ok=True)
+    np.savez(
+        cache_file,
+        key=key,
+        bugsets=probs.bugsets,
+        hits=probs.hits,
+        attempts=probs.attempts,
+        probs=probs.probs,
+        mutants=json.dumps(probs.mutants),
+    )
+    return probs
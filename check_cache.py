@@ -0,0 +1,53 @@
+# checks that columns.cached_read works on stores that only have json records (from before the binary format):
+# it reads them the same as columns.read, loads its export on the next call, and reads them again once one of
+# their json records changes
+import json
+import tempfile
+from os import path
+
+import numpy as np
+import plyvel
+
+import columns
+import results
+
+failures = 0
+
+
+def check(name, ok):
+    global failures
+    if not ok:
+        failures += 1
+    print(f"{name}: {'ok' if ok else 'FAILED'}")
+
+
+def same(a, b):
+    return a.mutants == b.mutants and all(
+        np.array_equal(getattr(a, x), getattr(b, x)) for x in list(columns.row_columns) + ["triage"]
+    )
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    columns.cache_dir = path.join(tmp, "cache")
+    filename = path.join(tmp, "btree_double_unshrunk_ldb")
+    db = plyvel.DB(filename, create_if_missing=True)
+    # one per-seed record and one per-combination record, as older runs and repair.py wrote them
+    db.put(results.legacy_key(1), json.dumps({
+        "A|B": {"type": "fail", "attempts": 3, "triage": [["A"]]},
+        "B|C": {"type": "nofail", "attempts": 500},
+    }).encode("utf8"))
+    db.put(results.json_seed_prefix(2) + b"A|C", json.dumps({"type": "fail", "attempts": 7, "triage": [["A"], ["C"]]}).encode("utf8"))
+    db.close()
+    stores = [("btree", 2, False, filename)]
+
+    first = columns.cached_read(stores, exclude=False)
+    check("first cached_read matches read", same(first, columns.read(stores, workers=1, exclude=False)))
+    second = columns.cached_read(stores, exclude=False)
+    check("second cached_read loads the export", isinstance(second.seed, np.memmap) and same(first, second))
+
+    db = plyvel.DB(filename)
+    db.put(results.json_seed_prefix(2) + b"A|C", json.dumps({"type": "nofail", "attempts": 500}).encode("utf8"))
+    db.close()
+    third = columns.cached_read(stores, exclude=False)
+    check("cached_read rereads changed json records", not same(first, third) and same(third, columns.read(stores, workers=1, exclude=False)))
+print(f"{failures} failures")
@@ -0,0 +1,151 @@
+# checks that bugprobs.get_probs and bugprobs.shrink_ratios give exactly the same probabilities and shrink ratios
+# as the per-seed dict loops analysis.py used to compute them with, on every store in data/ for the modules below.
+# the probabilities are also checked with hit_column="causes" against the rule btree_anal.ipynb used
+import itertools
+import math
+from collections import defaultdict
+from os import path
+
+import plyvel
+
+import bugprobs
+import columns
+import results
+from histogram import Log2Histogram
+
+modnames = ["btree", "avltree", "toml"]
+ncombos_to_check = [1, 2, 3]
+
+
+# analysis.get_probs as it was (or btree_anal.ipynb's with hit_column="causes"), reading whichever seeds the
+# stores have instead of seeds 1 to 100
+def dict_probs(modname, to_shrink, hit_column="singles"):
+    bug_probs = defaultdict(lambda: [0, 0])
+    for ncombos in ncombos_to_check:
+        filename = columns.store_path(modname, ncombos, to_shrink)
+        if not path.exists(filename):
+            continue
+        db = plyvel.DB(filename)
+        for seed in results.stored_seeds(db):
+            for (k, bug) in read_seed(db, modname, seed).items():
+                if bug["type"] == "timeout":
+                    continue
+                bugs = set(k.split("|"))
+                for l in range(1, len(bugs) + 1):
+                    for bugset in itertools.combinations(bugs, l):
+                        bugset = frozenset(bugset)
+                        if bug["type"] == "nofail":
+                            found = False
+                        elif hit_column == "singles":
+                            found = all([x] in bug["triage"] for x in bugset)
+                        else:
+                            found = all(any(x in triage_set for triage_set in bug["triage"]) for x in bugset)
+                        if not found:
+                            bug_probs[bugset][1] += 500
+                        else:
+                            bug_probs[bugset][0] += 1
+                            bug_probs[bugset][1] += bug["attempts"]
+        db.close()
+    return {k: a / b for (k, [a, b]) in bug_probs.items()}
+
+
+def read_seed(db, modname, seed):
+    return {
+        k: v for (k, v) in results.read_seed(db, seed, with_inputs=False).items()
+        if not any(x in k for x in columns.excluded_mutants(modname))
+    }
+
+
+# the ratio loop of analysis.py as it was, on the combination sizes that have both unshrunk and shrunk stores
+def dict_ratios(modname, bug_probs, ncombos_with_both):
+    ratios = []
+    for ncombos in ncombos_with_both:
+        unshrunk_db = plyvel.DB(columns.store_path(modname, ncombos, False))
+        shrunk_db = plyvel.DB(columns.store_path(modname, ncombos, True))
+        for seed in results.stored_seeds(unshrunk_db):
+            unshrunk_data = read_seed(unshrunk_db, modname, seed)
+            shrunk_data = read_seed(shrunk_db, modname, seed)
+            for k in unshrunk_data:
+                unshrunk_entry = unshrunk_data[k]
+                shrunk_entry = shrunk_data[k]
+                if "timeout" in (unshrunk_entry["type"], shrunk_entry["type"]):
+                    continue
+                if unshrunk_entry["type"] != "fail":
+                    continue
+                if any(len(x) > 1 for x in unshrunk_entry["triage"]) or any(len(x) > 1 for x in shrunk_entry["triage"]):
+                    continue
+                preset = frozenset(x for [x] in unshrunk_entry["triage"])
+                postset = frozenset(x for [x] in shrunk_entry["triage"])
+                if bug_probs[preset] == 0:
+                    ratio = "infinity"
+                else:
+                    ratio = bug_probs[postset] / bug_probs[preset]
+                ratios.append(ratio)
+        unshrunk_db.close()
+        shrunk_db.close()
+    return ratios
+
+
+# the bucketing loop of analysis.py as it was
+def dict_buckets(ratios):
+    buckets = defaultdict(int)
+    for ratio in ratios:
+        if ratio == 0:
+            continue
+        if ratio == "infinity":
+            buckets["infinity"] += 1
+            continue
+        log2 = math.log2(ratio)
+        if log2 < 0:
+            buckets[math.floor(log2)] += 1
+        elif log2 > 0:
+            buckets[math.ceil(log2)] += 1
+        else:
+            buckets[0] += 1
+    keys = [x for x in buckets.keys() if x != "infinity"]
+    for i in range(min(keys), max(keys) + 1):
+        buckets[i]
+    return dict(buckets)
+
+
+mismatches = 0
+for modname in modnames:
+    stores = [
+        (modname, ncombos, to_shrink, columns.store_path(modname, ncombos, to_shrink))
+        for ncombos in ncombos_to_check
+        for to_shrink in (False, True)
+    ]
+    data = columns.read([x for x in stores if path.exists(x[3])])
+    if modname not in data.modules:
+        print(f"{modname}: no stores, skipping")
+        continue
+    for (to_shrink, hit_column) in itertools.product((False, True), ("singles", "causes")):
+        expected = dict_probs(modname, to_shrink, hit_column)
+        got = bugprobs.to_dict(bugprobs.get_probs(data, modname, to_shrink, ncombos_to_check, hit_column))
+        bad = [k for k in expected.keys() | got.keys() if expected.get(k) != got.get(k)]
+        mismatches += len(bad)
+        for k in bad[:10]:
+            print(f"mismatch: {modname} {hit_column} {sorted(k)}: expected {expected.get(k)}, got {got.get(k)}")
+        print(f"{modname} {('unshrunk', 'shrunk')[to_shrink]} ({hit_column}): {len(expected)} bugsets")
+    ncombos_with_both = [x for x in ncombos_to_check if all(path.exists(columns.store_path(modname, x, y)) for y in (False, True))]
+    probs = bugprobs.get_probs(data, modname, False, ncombos_to_check)
+    expected = sorted(dict_ratios(modname, bugprobs.to_dict(probs), ncombos_with_both), key=str)
+    got = bugprobs.shrink_ratios(data, modname, probs, ncombos_with_both)
+    got = sorted(("infinity" if x == float("inf") else float(x) for x in got), key=str)
+    if got != expected:
+        mismatches += 1
+        print(f"mismatch: {modname} shrink ratios: expected {len(expected)}, got {len(got)}")
+    print(f"{modname} shrink ratios: {len(expected)} ratios")
+    # small chunks, each bucketed into its own histogram and merged, and one ratio at a time
+    merged = Log2Histogram()
+    for ratios in bugprobs.iter_shrink_ratios(data, modname, probs, ncombos_with_both, chunk_size=100):
+        chunk_histogram = Log2Histogram()
+        chunk_histogram.update(ratios)
+        merged.merge(chunk_histogram)
+    one_at_a_time = Log2Histogram()
+    for ratio in expected:
+        one_at_a_time.add(ratio)
+    if len(expected) > 0 and not (dict_buckets(expected) == merged.buckets() == one_at_a_time.buckets()):
+        mismatches += 1
+        print(f"mismatch: {modname} ratio histogram: expected {dict_buckets(expected)}, got {merged.buckets()}")
+print(f"{mismatches} mismatches")
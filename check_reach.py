@@ -0,0 +1,59 @@
+# checks that skip_unreached can't change any result: for every example of the first few seeds' corpora and every
+# single and double mutant combination, an example that reaches none of the combination's mutant sites in the
+# unmutated run (see corpus_reachability) has to pass when it is actually run with the combination, so replaying
+# with and without skipping gives the same attempts and failing input. also prints how many runs skipping saves
+import itertools
+
+import corpus
+import new_runner
+
+modnames = ["btree", "avltree", "toml"]
+ncombos_to_check = [1, 2]
+seeds_to_check = range(1, 4)
+
+mismatches = 0
+for modname in modnames:
+    new_runner.modname = modname
+    new_runner.default_module = new_runner.generate_module(new_runner.Mutagen())
+    new_runner.tracing_module.cache_clear()
+    new_runner.load_corpus.cache_clear()
+    new_runner.corpus_reachability.cache_clear()
+    module = new_runner.generate_module(new_runner.Mutagen())
+    copy_input = new_runner.input_copier(module)
+    directory = new_runner.module_corpus_dir(500)
+    for ncombos in ncombos_to_check:
+        jobs = [set(x) for x in itertools.combinations(sorted(module.mg.all_mutants), ncombos)]
+        (checked, skipped, replay_runs, skipping_runs) = (0, 0, 0, 0)
+        for seed_to_use in seeds_to_check:
+            if not corpus.has_corpus(directory, seed_to_use):
+                new_runner.generate_corpus(directory, seed_to_use, 500)
+            examples = new_runner.load_corpus(directory, seed_to_use)
+            reached = new_runner.corpus_reachability(directory, seed_to_use)
+            for job in jobs:
+                job_mask = new_runner.tracing_mask(job)
+                module.mg.current_mutants = job
+                # every example that would be skipped, not only the ones before the first failure
+                for (i, x) in enumerate(examples):
+                    if reached[i] & job_mask != 0:
+                        continue
+                    skipped += 1
+                    try:
+                        module.testing_function(copy_input(x))
+                    except KeyboardInterrupt:
+                        raise
+                    except BaseException as e:
+                        mismatches += 1
+                        print(f"mismatch: {modname} seed {seed_to_use} {sorted(job)}: example {i} fails but reaches none of the mutants")
+                full = new_runner.replay_corpus(module, examples)
+                skipping = new_runner.replay_corpus(module, examples, reached, job_mask)
+                if full[1] != skipping[1] or list(map(repr, full[0])) != list(map(repr, skipping[0])):
+                    mismatches += 1
+                    print(f"mismatch: {modname} seed {seed_to_use} {sorted(job)}: {full[1]} attempts replaying everything, {skipping[1]} skipping")
+                replay_runs += full[1]
+                skipping_runs += len([i for i in range(skipping[1]) if reached[i] & job_mask != 0])
+                checked += len(examples)
+        print(
+            f"{modname} {new_runner.names[ncombos]}: {skipped} of {checked} example runs reach none of the mutants, "
+            f"{replay_runs} runs replaying up to the first failure, {skipping_runs} skipping"
+        )
+print(f"{mismatches} mismatches")
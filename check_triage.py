@@ -0,0 +1,44 @@
+# checks that ddmin triage (triage_failure_dd) finds the same causes as the exhaustive triage_failure
+# on the failing inputs stored by existing runs, and how many testing_function runs each one needs
+import new_runner
+import plyvel
+import results
+import pickle
+from base64 import b64decode
+from os import path
+
+modnames = ["btree", "avltree", "toml"]
+ncombos_to_check = [2, 3]
+to_shrink = False
+
+mismatches = 0
+for modname in modnames:
+    new_runner.modname = modname
+    mod = new_runner.generate_module(new_runner.Mutagen())
+    for ncombos in ncombos_to_check:
+        filename = f"data/{modname}_{new_runner.names.get(ncombos, 'x' + str(ncombos))}_{('unshrunk', 'shrunk')[to_shrink]}_ldb"
+        if not path.exists(filename):
+            print(f"{filename}: missing, skipping")
+            continue
+        db = plyvel.DB(filename, create_if_missing=False)
+        (checked, exhaustive_runs, dd_runs) = (0, 0, 0)
+        for seed_to_use in results.stored_seeds(db):
+            for (k, entry) in results.read_seed(db, seed_to_use).items():
+                if entry["type"] != "fail":
+                    continue
+                job = set(k.split("|"))
+                fail = pickle.loads(b64decode(entry["fail"]))
+                # clear the cache so both strategies pay for every run they make
+                new_runner.triage_cache.clear()
+                exhaustive = new_runner.triage_failure(mod, job, fail)
+                exhaustive_runs += len(new_runner.triage_cache)
+                new_runner.triage_cache.clear()
+                dd = new_runner.triage_failure_dd(mod, job, fail)
+                dd_runs += len(new_runner.triage_cache)
+                checked += 1
+                if dd != exhaustive:
+                    mismatches += 1
+                    print(f"mismatch: seed {seed_to_use} {k}: exhaustive {exhaustive}, ddmin {dd}")
+        db.close()
+        print(f"{filename}: {checked} failures, {exhaustive_runs} runs exhaustive, {dd_runs} runs ddmin")
+print(f"{mismatches} mismatches")
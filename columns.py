@@ -0,0 +1,251 @@
+# columnar export of the result stores, for analysis code that wants arrays instead of per-seed dicts
+#
+# an export is a directory with one .npy file per column plus meta.json, so every column can be memory-mapped.
+# there is one row per (module, ncombos, shrink, seed, combination), and mutant masks use one mutant table per
+# module (meta.json's "mutants"), whatever order the stores number them in.
+#
+# usage: python columns.py  (exports every store in data/ for the modules below to data/columns)
+import ast
+import hashlib
+import json
+import os
+from multiprocessing import cpu_count, get_all_start_methods, get_context
+from multiprocessing.pool import ThreadPool
+from os import path
+from types import SimpleNamespace
+
+import numpy as np
+import plyvel
+from tqdm import tqdm
+
+import results
+
+modnames = ["btree", "avltree", "toml"]
+ncombos_to_export = [1, 2, 3]
+out_dir = "data/columns"
+# where cached_read keeps its exports
+cache_dir = "data/columns_cache"
+
+names = {1: "single", 2: "double", 3: "triple", 4: "quadruple"}
+
+# row columns and their dtypes
+# singles is the union of the single-mutant triage causes and causes the union of all of them;
+# the full list of causes of row i is triage[triage_start[i]:triage_start[i] + triage_count[i]]
+row_columns = {
+    "module": np.uint8,
+    "ncombos": np.uint8,
+    "shrunk": np.bool_,
+    "seed": np.uint32,
+    "combo": np.uint64,
+    "type": np.uint8,
+    "attempts": np.uint32,
+    "singles": np.uint64,
+    "causes": np.uint64,
+    "triage_start": np.uint64,
+    "triage_count": np.uint16,
+}
+
+
+def excluded_mutants(modname):
+    """
+    The mutants a subject module declares in excluded_mutants (a literal list), read from <modname>.py
+    without running it. Rows with any of them in their combination are dropped when results are loaded
+    """
+    with open(path.join(path.dirname(path.abspath(__file__)), modname + ".py"), "rb") as f:
+        tree = ast.parse(f.read(), modname + ".py")
+    excluded = []
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(x, ast.Name) and x.id == "excluded_mutants" for x in node.targets):
+            excluded = list(ast.literal_eval(node.value))
+    return excluded
+
+
+def store_path(modname, ncombos, to_shrink):
+    return f"data/{modname}_{names.get(ncombos, 'x' + str(ncombos))}_{('unshrunk', 'shrunk')[to_shrink]}_ldb"
+
+
+def read_store(store):
+    """
+    Read one store into column arrays numbered by its own mutant table, returning (table, columns)
+
+    Inputs:
+        * store [tuple] (modname, ncombos, to_shrink, store path)
+    """
+    (modname, ncombos, to_shrink, filename) = store
+    table = []
+    rows = {x: [] for x in row_columns}
+    triage = []
+    db = plyvel.DB(filename, create_if_missing=False)
+    for seed in results.stored_seeds(db):
+        for (combo, rtype, attempts, causes) in results.read_seed_masks(db, seed, table):
+            rows["seed"].append(seed)
+            rows["combo"].append(combo)
+            rows["type"].append(results.record_types.index(rtype))
+            rows["attempts"].append(attempts)
+            (singles, union) = (0, 0)
+            for cause in causes:
+                union |= cause
+                if cause & (cause - 1) == 0:
+                    singles |= cause
+            rows["singles"].append(singles)
+            rows["causes"].append(union)
+            rows["triage_start"].append(len(triage))
+            rows["triage_count"].append(len(causes))
+            triage += causes
+    db.close()
+    nrows = len(rows["seed"])
+    rows["ncombos"] = [ncombos] * nrows
+    rows["shrunk"] = [to_shrink] * nrows
+    columns = {x: np.array(rows[x], dtype=dtype) for (x, dtype) in row_columns.items() if x != "module"}
+    columns["triage"] = np.array(triage, dtype=np.uint64)
+    return (table, columns)
+
+
+def remap_masks(masks, store_table, table):
+    """ Renumber masks from store_table's mutant ids to table's """
+    if table[:len(store_table)] == store_table:
+        return masks
+    remapped = np.zeros_like(masks)
+    for (i, x) in enumerate(store_table):
+        remapped |= ((masks >> np.uint64(i)) & np.uint64(1)) << np.uint64(table.index(x))
+    return remapped
+
+
+def keep_rows(columns, keep):
+    """ The rows of one store's columns (as read_store returns them) where keep is True """
+    kept = {x: columns[x][keep] for x in columns if x != "triage"}
+    kept["triage"] = columns["triage"][np.repeat(keep, columns["triage_count"])]
+    kept["triage_start"] = (np.cumsum(kept["triage_count"], dtype=np.uint64) - kept["triage_count"]).astype(np.uint64)
+    return kept
+
+
+def read(stores, workers=None, exclude=True):
+    """
+    Read result stores into memory, in the same form load returns. The stores are read in parallel by
+    a pool of worker processes (by default one per store, up to the number of cpus). They are always forked,
+    whatever the start method is, so scripts can call this at the top level without a __main__ guard (threads
+    are used where fork isn't available)
+
+    Inputs:
+        * stores [list] (modname, ncombos, to_shrink, store path) for each store to read
+        * workers [int] the number of processes to use, 1 reads them in this process
+        * exclude [bool] drop the rows of combinations with a mutant in their module's excluded_mutants
+    """
+    if workers is None:
+        workers = max(min(len(stores), cpu_count()), 1)
+    if workers == 1:
+        read_stores = map(read_store, stores)
+    else:
+        pool = get_context("fork").Pool(workers) if "fork" in get_all_start_methods() else ThreadPool(workers)
+        read_stores = pool.imap(read_store, stores)
+    modules = []
+    tables = {}
+    excluded = {}
+    parts = []
+    for ((modname, _, _, filename), (store_table, columns)) in tqdm(zip(stores, read_stores), total=len(stores)):
+        if modname not in tables:
+            modules.append(modname)
+            tables[modname] = []
+            excluded[modname] = excluded_mutants(modname) if exclude else []
+        table = tables[modname]
+        table += [x for x in store_table if x not in table]
+        for x in ("combo", "singles", "causes", "triage"):
+            columns[x] = remap_masks(columns[x], store_table, table)
+        # a single pass over the combination masks drops every excluded row of the store
+        excluded_mask = np.uint64(results.to_mask(table, [x for x in excluded[modname] if x in table]))
+        if excluded_mask != 0:
+            columns = keep_rows(columns, (columns["combo"] & excluded_mask) == 0)
+        columns["module"] = np.full(len(columns["seed"]), modules.index(modname), dtype=row_columns["module"])
+        parts.append(columns)
+    if workers != 1:
+        pool.close()
+        pool.join()
+    # triage_start indexes the concatenated triage array
+    offset = 0
+    for columns in parts:
+        columns["triage_start"] += np.uint64(offset)
+        offset += len(columns["triage"])
+    columns = {
+        x: np.concatenate([np.zeros(0, dtype=row_columns.get(x, np.uint64))] + [part[x] for part in parts])
+        for x in list(row_columns) + ["triage"]
+    }
+    return SimpleNamespace(**columns, modules=modules, mutants=tables, excluded=excluded, types=results.record_types)
+
+
+def save(data, directory, fingerprints=None):
+    """ Write data (as returned by read) to a columnar directory, along with the fingerprints of its stores if given """
+    os.makedirs(directory, exist_ok=True)
+    # meta.json is written last, so an export without one is incomplete
+    if path.exists(path.join(directory, "meta.json")):
+        os.remove(path.join(directory, "meta.json"))
+    for column in list(row_columns) + ["triage"]:
+        np.save(path.join(directory, column + ".npy"), getattr(data, column))
+    meta = {"modules": data.modules, "mutants": data.mutants, "excluded": data.excluded, "types": data.types}
+    if fingerprints is not None:
+        meta["fingerprints"] = fingerprints
+    with open(path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+
+def export(stores, directory):
+    """ Read result stores (see read) and save them to a columnar directory, returning the number of rows """
+    data = read(stores)
+    save(data, directory)
+    return len(data.seed)
+
+
+def load(directory, mmap=True):
+    """
+    Load an export as a namespace with one array per column (memory-mapped unless mmap=False),
+    plus modules, mutants, excluded and types from meta.json
+    """
+    with open(path.join(directory, "meta.json")) as f:
+        meta = json.load(f)
+    columns = {
+        x: np.load(path.join(directory, x + ".npy"), mmap_mode="r" if mmap else None)
+        for x in list(row_columns) + ["triage"]
+    }
+    return SimpleNamespace(**columns, **meta)
+
+
+def store_fingerprints(stores):
+    """ results.store_fingerprint of each of the stores (as read takes them) """
+    fingerprints = []
+    for (_, _, _, filename) in stores:
+        db = plyvel.DB(filename, create_if_missing=False)
+        fingerprints.append(results.store_fingerprint(db))
+        db.close()
+    return fingerprints
+
+
+def cached_read(stores, exclude=True):
+    """
+    read, with the result kept as an export in cache_dir. The export is loaded instead of reading the stores
+    as long as none of them have been written to since it was made (see results.store_fingerprint)
+    """
+    fingerprints = store_fingerprints(stores)
+    excluded = {modname: excluded_mutants(modname) if exclude else [] for (modname, _, _, _) in stores}
+    params = json.dumps([[list(x) for x in stores], excluded])
+    # one export per list of stores, overwritten whenever they change
+    directory = path.join(cache_dir, hashlib.sha256(params.encode("utf8")).hexdigest()[:16])
+    if path.exists(path.join(directory, "meta.json")):
+        data = load(directory)
+        if getattr(data, "fingerprints", None) == fingerprints:
+            return data
+    data = read(stores, exclude=exclude)
+    save(data, directory, fingerprints)
+    return data
+
+
+if __name__ == "__main__":
+    stores = [
+        (modname, ncombos, to_shrink, store_path(modname, ncombos, to_shrink))
+        for modname in modnames
+        for ncombos in ncombos_to_export
+        for to_shrink in (False, True)
+    ]
+    for (modname, ncombos, to_shrink, filename) in stores:
+        if not path.exists(filename):
+            print(f"{filename}: missing, skipping")
+    nrows = export([x for x in stores if path.exists(x[3])], out_dir)
+    print(f"wrote {nrows} rows to {out_dir}")
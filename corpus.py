@@ -0,0 +1,71 @@
+# per-seed example corpora: the examples hypothesis generates for a seed, stored once so they can be replayed
+# against every mutant combination instead of being generated again for each one (see use_corpus in new_runner.py)
+#
+# a corpus is two files per seed in a directory keyed on whatever the examples depend on (the module source,
+# the number of examples, the hypothesis version): <seed>.pkl, the pickled examples one after the other, and
+# <seed>.npy, the offsets of each example in it (plus the end offset). both can be memory-mapped, and the .npy is
+# written last, so a corpus with an .npy is complete
+import hashlib
+import json
+import mmap
+import os
+import pickle
+from os import path
+
+import numpy as np
+
+corpus_root = "data/corpus"
+
+
+def corpus_dir(modname, key):
+    """ The directory the corpora of a module are kept in for a key (a json-serializable list) """
+    return path.join(corpus_root, f"{modname}_{hashlib.sha256(json.dumps(key).encode('utf8')).hexdigest()[:16]}")
+
+
+def corpus_files(directory, seed):
+    return (path.join(directory, f"{seed}.pkl"), path.join(directory, f"{seed}.npy"))
+
+
+def has_corpus(directory, seed):
+    return path.exists(corpus_files(directory, seed)[1])
+
+
+def write_corpus(directory, seed, examples):
+    """ Store a seed's examples, replacing any corpus it already has """
+    os.makedirs(directory, exist_ok=True)
+    (data_file, offsets_file) = corpus_files(directory, seed)
+    offsets = [0]
+    tmp_file = f"{data_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "wb") as f:
+        for x in examples:
+            f.write(pickle.dumps(x))
+            offsets.append(f.tell())
+    os.replace(tmp_file, data_file)
+    tmp_file = f"{offsets_file}.{os.getpid()}.tmp.npy"
+    np.save(tmp_file, np.array(offsets, dtype=np.uint64))
+    os.replace(tmp_file, offsets_file)
+
+
+class Corpus:
+    """
+    A stored corpus, memory-mapped. Examples are unpickled when they are indexed, so each call
+    returns a fresh copy
+    """
+
+    def __init__(self, directory, seed):
+        (data_file, offsets_file) = corpus_files(directory, seed)
+        self.offsets = np.load(offsets_file, mmap_mode="r")
+        with open(data_file, "rb") as f:
+            # mmap can't map an empty file, which a corpus of 0 examples is
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.offsets[-1] > 0 else b""
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return pickle.loads(self.data[int(self.offsets[i]):int(self.offsets[i + 1])])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
@@ -0,0 +1,63 @@
+import math
+from collections import defaultdict
+
+import numpy as np
+
+
+class Log2Histogram:
+    """
+    Streaming histogram of positive ratios by power of two, with the buckets analysis.py plots: bucket b > 0
+    holds (2^(b-1), 2^b], bucket b < 0 holds [2^b, 2^(b+1)), bucket 0 holds exactly 1, and "infinity" holds
+    infinite ratios. Ratios of 0 are counted in zeros but not bucketed.
+
+    Ratios can be added one at a time or an array at a time, and histograms filled separately (e.g. one per
+    worker or per chunk of results) can be merged, so memory only grows with the number of buckets.
+    """
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.zeros = 0
+
+    def add(self, ratio):
+        """ Count one ratio (a number, or "infinity") """
+        if ratio == 0:
+            self.zeros += 1
+        elif ratio == "infinity" or ratio == math.inf:
+            self.counts["infinity"] += 1
+        else:
+            log2 = math.log2(ratio)
+            if log2 < 0:
+                self.counts[math.floor(log2)] += 1
+            elif log2 > 0:
+                self.counts[math.ceil(log2)] += 1
+            else:
+                self.counts[0] += 1
+
+    def update(self, ratios):
+        """ Count an array of ratios, with np.inf for infinite ones """
+        ratios = np.asarray(ratios, dtype=np.float64)
+        self.zeros += int(np.count_nonzero(ratios == 0))
+        infinite = np.isinf(ratios)
+        if infinite.any():
+            self.counts["infinity"] += int(np.count_nonzero(infinite))
+        with np.errstate(divide="ignore"):
+            log2 = np.log2(ratios[(ratios != 0) & ~infinite])
+        buckets = np.where(log2 < 0, np.floor(log2), np.ceil(log2)).astype(np.int64)
+        for (bucket, count) in zip(*np.unique(buckets, return_counts=True)):
+            self.counts[int(bucket)] += int(count)
+
+    def merge(self, other):
+        """ Add the counts of another histogram to this one, and return this one """
+        for (bucket, count) in other.counts.items():
+            self.counts[bucket] += count
+        self.zeros += other.zeros
+        return self
+
+    def buckets(self):
+        """ Dict of bucket to count, with every finite bucket between the smallest and largest filled in """
+        buckets = dict(self.counts)
+        finite = [x for x in buckets if x != "infinity"]
+        if len(finite) > 0:
+            for i in range(min(finite), max(finite) + 1):
+                buckets.setdefault(i, 0)
+        return buckets
@@ -22,17 +22,39 @@ class Mutagen:
         self.mutant_registry = {APPLY_TO_ALL: {}}
         self.all_mutants = set()
 
+        # Each mutant name gets its own bit, so the current mutants can be kept as an integer mask
+        self.mutant_bits = {}
+
         # Current mutant
-        self.current_mutants = set()
+        self.current_mask = 0
 
         self.linked_files = {}
     
     def __repr__(self):
         return f"{self.__class__.__name__}(all_mutants={self.all_mutants!r}, current_mutants={self.current_mutants!r})"
 
+    @property
+    def current_mutants(self):
+        """ Frozenset of the names of the current active mutants (it is built from current_mask, so assign to change it) """
+        return frozenset(name for (name, bit) in self.mutant_bits.items() if self.current_mask & bit)
+
+    @current_mutants.setter
+    def current_mutants(self, mutants):
+        mask = 0
+        for mutation in mutants:
+            mask |= self.mutant_bit(mutation)
+        self.current_mask = mask
+
+    def mutant_bit(self, mutation):
+        """ Return the bit assigned to mutation, assigning a new one if it doesn't have one yet """
+        bit = self.mutant_bits.get(mutation)
+        if bit is None:
+            bit = self.mutant_bits[mutation] = 1 << len(self.mutant_bits)
+        return bit
+
     def active_mutant(self, mutation):
         """ Return True if the current active mutant is mutation, else False """
-        return mutation in self.current_mutants
+        return (self.current_mask & self.mutant_bits.get(mutation, 0)) != 0
 
     def not_mutant(self, mutation):
         """ Return False if the current active mutant is mutation, else True """
@@ -47,11 +69,29 @@ class Mutagen:
             * good [lambda expression] corresponds to the normal behavior
             * bad [lambda expression] corresponds to the mutated behavior
         """
-        if self.active_mutant(mutation):
+        if self.current_mask & self.mutant_bits.get(mutation, 0):
             return bad()
         else:
             return good()
 
+    def select(self, mutation, good, bad):
+        """
+        Return one of two values depending on the current active mutant
+
+        Unlike mut, both values are evaluated by the caller before the mutant is checked, so no
+        closures are created per call. Only use this when both values are cheap to compute and
+        evaluating the unused one can't fail or have side effects.
+
+        Inputs:
+            * mutation [string] represents a mutant name
+            * good [any] corresponds to the normal behavior
+            * bad [any] corresponds to the mutated behavior
+        """
+        if self.current_mask & self.mutant_bits.get(mutation, 0):
+            return bad
+        else:
+            return good
+
     def check_linked_files(self, file, default_value):
         """
         Replace each file in the list with its eventual linked file
@@ -115,6 +155,7 @@ class Mutagen:
                 )
         
         self.all_mutants.add(mutant_name)
+        self.mutant_bit(mutant_name)
 
     def has_mutant(self, mutant_name, file=None, description=""):
         """
@@ -197,4 +238,48 @@ class Mutagen:
                 del mutant
         self.mutant_registry = {APPLY_TO_ALL: {}}
         self.all_mutants = set()
-        self.current_mutants = set()
+        self.mutant_bits = {}
+        self.current_mask = 0
+
+
+class TracingMutagen(Mutagen):
+    """
+    Mutagen that also records which mutant sites were evaluated: every mut, select, active_mutant
+    and not_mutant call ors its mutant's bit into reached_mask. A mutant whose sites weren't reached
+    by a run can't have changed it
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.reached_mask = 0
+
+    @classmethod
+    def trace(cls, mg):
+        """
+        Turn an existing Mutagen into a TracingMutagen in place and return it. Modules like btree
+        create their own mg instead of using the one they are given, so that is the one to trace
+        """
+        mg.__class__ = cls
+        mg.reached_mask = 0
+        return mg
+
+    def active_mutant(self, mutation):
+        bit = self.mutant_bits.get(mutation, 0)
+        self.reached_mask |= bit
+        return (self.current_mask & bit) != 0
+
+    def mut(self, mutation, good, bad):
+        bit = self.mutant_bits.get(mutation, 0)
+        self.reached_mask |= bit
+        if self.current_mask & bit:
+            return bad()
+        else:
+            return good()
+
+    def select(self, mutation, good, bad):
+        bit = self.mutant_bits.get(mutation, 0)
+        self.reached_mask |= bit
+        if self.current_mask & bit:
+            return bad
+        else:
+            return good
@@ -8,6 +8,43 @@ ncombos = 1
 # the number of seeds to use (probably don't need to change)
 nseeds = 100
 
+# runner options (probably don't need to change)
+# run each combination against a copy of the module with its mutant sites folded to constants
+# (the normal module is still used for triage, which needs to switch mutants on and off)
+specialize = False
+# how examples are copied before being handed to testing_function: "deepcopy" always deep copies them,
+# "auto" goes by the module's testing_mutates_input (no copy if False, a fast list/dict copy if True,
+# deepcopy if it isn't declared)
+copy_inputs = "auto"
+# how failures are triaged: "exhaustive" tries every subset of the combination, "ddmin" finds the minimal
+# causes with delta debugging (see triage_failure_dd), "auto" uses ddmin for combinations of more than 4 mutants
+triage_mode = "auto"
+# generate each seed's examples once (kept in data/corpus) and replay them against every combination instead of
+# having hypothesis generate them again for each one. only used for unshrunk runs, since shrinking needs hypothesis
+# to run the test itself. attempts are the same as with hypothesis, since it generates the same examples up to the
+# first failure, and the failing input reported is the first one
+use_corpus = False
+# the order combinations are tested in with use_corpus: "combination" replays the whole corpus for one combination
+# after another, "example" runs every combination that hasn't failed yet on one example before going on to the next
+# (see run_example_major), handing each worker combinations_per_job of a seed's combinations at a time
+evaluation_order = "combination"
+combinations_per_job = 64
+# with use_corpus, run each corpus example once with no mutants to see which mutant sites it reaches, and count
+# examples that reach none of a combination's mutants as passes without running them (they can't behave any
+# differently from the unmutated run). check_reach.py checks that this gives the same results as running everything
+skip_unreached = False
+# how worker processes are started: "fork" forks them from this process once it has imported everything and built
+# the modules they run (see prepare_workers), so they start almost instantly and share that memory copy-on-write,
+# "forkserver" forks them from a server process that has imported this module and built them, and "spawn" starts fresh
+# interpreters that import everything and build the modules again (the only one there is where fork isn't)
+start_method = "fork"
+# the pool's watchdog: a worker that spends more than job_timeout seconds per combination on a job, or more than
+# example_timeout seconds on a single run of testing_function, is killed and replaced. a job of one combination
+# that times out is stored as a "timeout" result, and one of several is split up and its combinations run again
+# one at a time. None turns either check off
+job_timeout = 600
+example_timeout = 60
+
 import hypothesis
 from hypothesis import (
     example,
@@ -20,16 +57,27 @@ from hypothesis import (
     seed,
 )
 import itertools
-from multiprocessing import Process, Queue, cpu_count, set_start_method
-from new_mutagen import Mutagen
+from multiprocessing import cpu_count, get_context
+from multiprocessing.connection import wait
+from new_mutagen import Mutagen, TracingMutagen
+from specialize import specialize as specialize_module, module_functions, specialize_function
+import ast
+from functools import lru_cache, partial
 from os import path
-from types import SimpleNamespace
+import os
+import hashlib
+import marshal
+from importlib.util import MAGIC_NUMBER
+from types import FunctionType, SimpleNamespace
 from copy import deepcopy
 import json
 from tqdm import tqdm
 from base64 import b64encode
 import plyvel
 import pickle
+import results
+import corpus
+import time
 
 # stop hypothesis from printing error tracebacks
 object.__setattr__(
@@ -44,10 +92,87 @@ names = {1: "single", 2: "double", 3: "triple", 4: "quadruple"}
 filename = f"data/{modname}_{names.get(ncombos, 'x' + str(ncombos))}_{('unshrunk', 'shrunk')[to_shrink]}"
 
 
-# generate a module with a given mutagen instance
-def generate_module(mg):
-    with open(path.join(path.dirname(__file__), modname + ".py")) as f:
-        code = f.read()
+code_cache = {}
+source_cache = {}
+
+
+# what the in-memory caches go by: a file is only read and hashed again once its mtime or size changes
+def source_stat(file):
+    st = os.stat(file)
+    return (file, st.st_mtime_ns, st.st_size)
+
+
+# a file's source and (path, mtime, content hash), read and hashed once per version of the file
+def read_source(file):
+    stat = source_stat(file)
+    cached = source_cache.get(file)
+    if cached is None or cached[0] != stat:
+        with open(file, "rb") as f:
+            source = f.read()
+        cached = source_cache[file] = (stat, source, (file, stat[1], hashlib.sha256(source).hexdigest()))
+    return cached[1:]
+
+
+# compile a subject module's source once and reuse the code object afterwards
+# cached in memory by path, mtime and size, and also kept on disk in __pycache__ (like a .pyc, one file per module
+# holding the hash of the source it was compiled from) so fresh processes don't have to recompile it either.
+# the source is only read and hashed when the in-memory cache misses
+def compile_module(file):
+    stat = source_stat(file)
+    if stat in code_cache:
+        return code_cache[stat]
+    (source, key) = read_source(file)
+    digest = bytes.fromhex(key[2])
+    cache_file = path.join(path.dirname(file), "__pycache__", f"{path.basename(file)}.runner.pyc")
+    code = None
+    try:
+        with open(cache_file, "rb") as f:
+            if f.read(len(MAGIC_NUMBER)) == MAGIC_NUMBER and f.read(len(digest)) == digest:
+                code = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    if code is None:
+        code = compile(source, file, "exec")
+        try:
+            os.makedirs(path.dirname(cache_file), exist_ok=True)
+            tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, "wb") as f:
+                f.write(MAGIC_NUMBER)
+                f.write(digest)
+                marshal.dump(code, f)
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass
+    code_cache[stat] = code
+    return code
+
+
+# compile a copy of a subject module with every mutant site folded for a fixed set of active mutants
+# only the most recent mutant sets are kept since a run can go through thousands of them. generate_module only
+# needs this for the module with no mutants active, and for mutants with sites outside functions
+@lru_cache(maxsize=128)
+def compile_specialized(key, mutants):
+    (source, _) = read_source(key[0])
+    return specialize_module(source, key[0], mutants)
+
+
+# the functions of a subject module that can be specialized one at a time (see specialize.module_functions)
+@lru_cache(maxsize=1)
+def specializable_functions(key):
+    (source, _) = read_source(key[0])
+    return module_functions(ast.parse(source, key[0]))
+
+
+# the code of the index-th of specializable_functions folded for the active mutants with a site in it
+# a function is only compiled again for the mutants that change it, so there are few of these even over every
+# combination of a run, and they are all kept
+@lru_cache(maxsize=None)
+def compile_specialized_function(key, index, active):
+    (path, node, _) = specializable_functions(key)[0][index]
+    return specialize_function(path, node, key[0], active)
+
+
+def exec_module(code, mg):
     vals = {"mg": mg}
     exec(code, vals)
     ret = SimpleNamespace()
@@ -56,6 +181,47 @@ def generate_module(mg):
     return ret
 
 
+# the module with no mutants active, with the code of the functions that have sites of the given mutants swapped
+# for their specialized code. returns None if that can't be done (e.g. a function was replaced by a decorator),
+# since then the whole module has to be specialized
+def specialize_functions(key, mg, mutants):
+    (functions, elsewhere) = specializable_functions(key)
+    if mutants & elsewhere:
+        return None
+    module = exec_module(compile_specialized(key, frozenset()), mg)
+    for (i, (path, _, sites)) in enumerate(functions):
+        if len(mutants & sites) == 0:
+            continue
+        func = module
+        for name in path:
+            func = getattr(func, name, None)
+        code = compile_specialized_function(key, i, mutants & sites)
+        if (
+            not isinstance(func, FunctionType)
+            or func.__code__.co_firstlineno != code.co_firstlineno
+            or func.__code__.co_freevars != code.co_freevars
+        ):
+            return None
+        func.__code__ = code
+    return module
+
+
+# generate a module with a given mutagen instance
+# if specialize_for is a set of mutants, the module is built with those mutants baked in (see specialize.py):
+# this is the module with no mutants active, the same for every combination, with only the functions that have
+# sites of those mutants swapped for ones compiled for them, so each combination only compiles what it changes
+def generate_module(mg, specialize_for=None):
+    file = path.join(path.dirname(path.abspath(__file__)), modname + ".py")
+    if specialize_for is None:
+        return exec_module(compile_module(file), mg)
+    key = read_source(file)[1]
+    mutants = frozenset(specialize_for)
+    module = specialize_functions(key, mg, mutants)
+    if module is None:
+        module = exec_module(compile_specialized(key, mutants), mg)
+    return module
+
+
 # get a module to get a mutant list
 default_module = generate_module(Mutagen())
 default_mg = deepcopy(default_module.mg)
@@ -68,6 +234,52 @@ def gen_mutants(mutants):
     return generate_module(mg)
 
 
+atomic_types = {int, float, complex, str, bytes, bool, type(None)}
+
+
+# deepcopy specialized for the list/dict/primitive trees hypothesis generates, falling back to deepcopy for anything else
+def fast_copy(x):
+    t = type(x)
+    if t in atomic_types:
+        return x
+    if t is list:
+        return [fast_copy(v) for v in x]
+    if t is dict:
+        return {k: fast_copy(v) for (k, v) in x.items()}
+    return deepcopy(x)
+
+
+def no_copy(x):
+    return x
+
+
+# pick how to copy a module's examples before running testing_function on them (see copy_inputs)
+def input_copier(module):
+    mutates = getattr(module, "testing_mutates_input", None)
+    if copy_inputs == "deepcopy" or mutates is None:
+        return deepcopy
+    return fast_copy if mutates else no_copy
+
+
+# copy used to keep failing examples around, which only happens a handful of times per run
+def snapshot_copier():
+    return deepcopy if copy_inputs == "deepcopy" else fast_copy
+
+
+# shared with the pool (see start_worker) in worker processes, None anywhere else
+worker_progress = None
+
+
+# let the watchdog know a run of testing_function is starting
+# attempt is the example's number when it is one the job's attempts count (the ones up to the first failure),
+# which a timeout record takes its attempts from
+def example_started(attempt=None):
+    if worker_progress is not None:
+        worker_progress.example_start.value = time.monotonic()
+        if attempt is not None:
+            worker_progress.attempts.value = attempt
+
+
 # run a test given a module, a seed, a phase (with_shrink/without_shrink)
 # max number of examples (the more the slower), and any additional kwargs to pass to hypothesis
 def run_test(
@@ -79,6 +291,8 @@ def run_test(
 ):
     fails = []
     attempts = 0
+    copy_input = input_copier(module)
+    snapshot = snapshot_copier()
 
     @seed(seed_to_use)
     @given(module.testing_strategy)
@@ -96,10 +310,11 @@ def run_test(
         nonlocal attempts
         if len(fails) == 0:
             attempts += 1
+        example_started(attempts if len(fails) == 0 else None)
         try:
-            module.testing_function(deepcopy(x))
+            module.testing_function(copy_input(x))
         except BaseException as e:
-            fails.append(deepcopy(x))
+            fails.append(snapshot(x))
             raise
 
     try:
@@ -111,113 +326,644 @@ def run_test(
     return (fails, attempts)
 
 
+# generate a seed's examples the way run_test would, by running hypothesis with a testing function that only
+# records them, and store them as the seed's corpus
+def generate_corpus(directory, seed_to_use, examples=500):
+    generated = []
+    recorder = SimpleNamespace(
+        testing_strategy=default_module.testing_strategy,
+        testing_function=generated.append,
+        testing_mutates_input=False,
+    )
+    run_test(recorder, seed_to_use=seed_to_use, phase=without_shrink, examples=examples)
+    corpus.write_corpus(directory, seed_to_use, generated)
+
+
+# the corpus directory for the current module and number of examples
+def module_corpus_dir(examples=500):
+    file = path.join(path.dirname(path.abspath(__file__)), modname + ".py")
+    return corpus.corpus_dir(modname, [read_source(file)[1][2], examples, hypothesis.__version__])
+
+
+# a seed's corpus as a list, kept for the combinations after the first since a worker gets a seed's jobs in a row
+@lru_cache(maxsize=2)
+def load_corpus(directory, seed_to_use):
+    return list(corpus.Corpus(directory, seed_to_use))
+
+
+# a module whose mg records the mutant sites each run reaches, built once per process
+@lru_cache(maxsize=1)
+def tracing_module():
+    module = generate_module(Mutagen())
+    TracingMutagen.trace(module.mg)
+    return module
+
+
+# the module a worker runs combinations with, also built once per process
+@lru_cache(maxsize=1)
+def worker_module():
+    return generate_module(Mutagen())
+
+
+# build everything workers need before they are forked, so forked workers inherit it instead of each building their own
+def build_worker_modules():
+    worker_module()
+    if skip_unreached:
+        tracing_module()
+
+
+# set to the name of the module workers run run_jobs from when they are started by a forkserver, which then builds
+# the modules they need as soon as it imports it (see below)
+forkserver_env = "NEW_RUNNER_FORKSERVER_MODULE"
+
+
+# build everything workers need before they are started, so they inherit it instead of each building their own:
+# forked workers get this process's modules, and forkserver workers the ones the forkserver builds when it preloads
+# the runner. run as a script, the runner is __main__, which the forkserver imports from its path as __mp_main__
+# (the module workers then find run_jobs in), so "__main__" is preloaded along with "new_runner"
+def prepare_workers(context):
+    build_worker_modules()
+    if context.get_start_method() == "forkserver":
+        if __name__ == "__main__":
+            (preload, worker_modname) = (["__main__", "new_runner"], "__mp_main__")
+        else:
+            (preload, worker_modname) = ([__name__], __name__)
+        os.environ[forkserver_env] = worker_modname
+        context.set_forkserver_preload(preload)
+
+
+# this module is being preloaded by the forkserver of a pool (see prepare_workers)
+if os.environ.get(forkserver_env) == __name__:
+    build_worker_modules()
+
+
+# the mask of a set of mutants in tracing_module's numbering
+def tracing_mask(mutants):
+    return sum(tracing_module().mg.mutant_bit(x) for x in set(mutants))
+
+
+# for each example of a seed's corpus, the mask (see tracing_mask) of the mutant sites an unmutated run on it reaches,
+# or -1 (every mutant) if the unmutated run fails on it
+# each traced run counts as a run of testing_function for the watchdog's example_timeout, like any other
+@lru_cache(maxsize=2)
+def corpus_reachability(directory, seed_to_use):
+    module = tracing_module()
+    copy_input = input_copier(module)
+    module.mg.current_mutants = set()
+    reached = []
+    for x in load_corpus(directory, seed_to_use):
+        module.mg.reached_mask = 0
+        example_started()
+        try:
+            module.testing_function(copy_input(x))
+            reached.append(module.mg.reached_mask)
+        except KeyboardInterrupt:
+            raise
+        except BaseException as e:
+            reached.append(-1)
+    return reached
+
+
+# same as run_test without shrinking, but going through a seed's stored examples in order
+# with reached (from corpus_reachability), examples that reach none of the mutants in job_mask are skipped
+def replay_corpus(module, examples, reached=None, job_mask=0):
+    copy_input = input_copier(module)
+    for (i, x) in enumerate(examples):
+        if reached is not None and reached[i] & job_mask == 0:
+            continue
+        example_started(i + 1)
+        try:
+            module.testing_function(copy_input(x))
+        except KeyboardInterrupt:
+            raise
+        except BaseException as e:
+            return ([x], i + 1)
+    return ([], len(examples))
+
+
+# whether testing_function failed on an input under a set of mutants, keyed on (hash of the pickled input, mutant set)
+# shared by every triage in this process, since combinations that share mutants often fail on the same input
+triage_cache = {}
+triage_cache_limit = 1 << 16
+
+
+def input_hash(data, pickled=None):
+    return hashlib.sha256(pickle.dumps(data) if pickled is None else pickled).digest()
+
+
+# run testing_function on a failing input under a set of mutants and report whether it failed, going through triage_cache
+def fails_with(module, mutants, data, data_hash, copy_input):
+    key = (data_hash, mutants)
+    failed = triage_cache.get(key)
+    if failed is None:
+        module.mg.current_mutants = mutants
+        example_started()
+        try:
+            module.testing_function(copy_input(data))
+            failed = False
+        except KeyboardInterrupt:
+            raise
+        except BaseException as e:
+            failed = True
+        if len(triage_cache) >= triage_cache_limit:
+            triage_cache.clear()
+        triage_cache[key] = failed
+    return failed
+
+
 # figure out which bugs triggered a failure
 # return value is a set of sets (e.g. {{a, b}, {c, d, e}})
 # which can be interpreted as ((a ^ b) v (c ^ d ^ e)) as bug cause
-def triage_failure(module, mutants, data):
+# subsets are tried smallest first and supersets of a known cause are skipped
+def triage_failure(module, mutants, data, data_hash=None):
     bs = set()
+    copy_input = input_copier(module)
+    if data_hash is None:
+        data_hash = input_hash(data)
     for l in range(1, len(mutants) + 1):
         for s in itertools.combinations(mutants, l):
-            s = set(s)
-            if not any(x <= s for x in bs):
-                module.mg.current_mutants = s
-                try:
-                    module.testing_function(deepcopy(data))
-                except KeyboardInterrupt:
-                    raise
-                except BaseException as e:
-                    bs.add(frozenset(s))
+            s = frozenset(s)
+            if not any(x <= s for x in bs) and fails_with(module, s, data, data_hash, copy_input):
+                bs.add(s)
     return bs
 
 
-# runs all of the testing jobs that have been allocated to this thread
-def run_jobs(jobs, data_queue, test_settings={}, pbar=None, thread_name="?"):
-    data = {}
-    testing_module = generate_module(Mutagen())
+# shrink a failing set of mutants to a minimal failing subset with delta debugging (ddmin)
+def ddmin(fails, mutants):
+    mutants = list(mutants)
+    n = 2
+    while len(mutants) >= 2:
+        chunks = [mutants[i * len(mutants) // n:(i + 1) * len(mutants) // n] for i in range(n)]
+        for chunk in chunks:
+            if fails(frozenset(chunk)):
+                (mutants, n) = (chunk, 2)
+                break
+        else:
+            for chunk in chunks:
+                complement = [x for x in mutants if x not in chunk]
+                if fails(frozenset(complement)):
+                    (mutants, n) = (complement, max(n - 1, 2))
+                    break
+            else:
+                if n >= len(mutants):
+                    break
+                n = min(2 * n, len(mutants))
+    return frozenset(mutants)
+
+
+# same result as triage_failure in far fewer runs for large combinations: single mutants are tried one by one,
+# then the causes made of several mutants are found with ddmin among the mutants that don't fail alone,
+# in roughly O(k log n) runs per cause. every other cause has to leave out at least one mutant of a cause that
+# was found, so the search continues on the set minus each of those mutants. this assumes that adding mutants
+# to a failing set keeps it failing, which isn't always true (one mutant can mask another), so the results
+# can differ from triage_failure; check_triage.py compares the two on stored runs
+def triage_failure_dd(module, mutants, data, data_hash=None):
+    copy_input = input_copier(module)
+    if data_hash is None:
+        data_hash = input_hash(data)
+
+    def fails(s):
+        return fails_with(module, s, data, data_hash, copy_input)
+
+    bs = {frozenset([x]) for x in mutants if fails(frozenset([x]))}
+    searched = set()
+    to_search = [frozenset(mutants) - {x for [x] in bs}]
+    while len(to_search) > 0:
+        s = to_search.pop()
+        if s in searched or len(s) < 2:
+            continue
+        searched.add(s)
+        if not fails(s):
+            continue
+        cause = next((x for x in bs if x <= s), None)
+        if cause is None:
+            cause = ddmin(fails, s)
+            bs.add(cause)
+        to_search.extend(s - {x} for x in cause)
+    return bs
+
+
+# triage with whichever strategy triage_mode picks for a combination of this size
+def triage_mutants(module, mutants, data, data_hash=None):
+    if triage_mode == "ddmin" or (triage_mode == "auto" and len(mutants) > 4):
+        return triage_failure_dd(module, mutants, data, data_hash)
+    return triage_failure(module, mutants, data, data_hash)
+
+
+# the module a combination is tested with: testing_module with the combination's mutants on,
+# or a module built for them if specialize is set
+def job_module(testing_module, job):
+    testing_module.mg.current_mutants = job
+    if not specialize:
+        return testing_module
+    test_module = generate_module(Mutagen(), specialize_for=job)
+    test_module.mg.current_mutants = job
+    return test_module
+
+
+# example-major version of replay_corpus for several combinations at once: every example is run under each
+# combination that hasn't failed yet before moving on to the next one, so each example is only fetched once
+# returns (fails, attempts) for each job, like replay_corpus (including skipping examples with reached)
+def run_example_major(testing_module, jobs, examples, reached=None):
+    (modules, masks) = ([], [])
     for job in jobs:
-        k = "|".join(job)
-        if pbar is not None:
-            pbar.set_description(f"thread {thread_name} ({k})")
-        testing_module.mg.current_mutants = job
-        (fails, attempts) = run_test(testing_module, **test_settings)
-        if len(fails) > 0:
-            fail = fails[-1]
-            triage = [list(x) for x in triage_failure(testing_module, job, fail)]
-            data[k] = {
-                "type": "fail",
-                "attempts": attempts,
-                "fail": b64encode(pickle.dumps(fail)).decode("utf8"),
-                "triage": triage,
-                "fail_repr": repr(fail),
-            }
+        modules.append(job_module(testing_module, job))
+        # switching between combinations only has to set the mutant mask
+        masks.append(modules[-1].mg.current_mask)
+    copiers = [input_copier(x) for x in modules]
+    job_masks = [tracing_mask(job) for job in jobs] if reached is not None else None
+    outcomes = [([], len(examples)) for _ in jobs]
+    pending = list(range(len(jobs)))
+    for (i, x) in enumerate(examples):
+        still_pending = []
+        example_started(i + 1)
+        for j in pending:
+            if reached is not None and reached[i] & job_masks[j] == 0:
+                still_pending.append(j)
+                continue
+            example_started()
+            module = modules[j]
+            module.mg.current_mask = masks[j]
+            try:
+                module.testing_function(copiers[j](x))
+                still_pending.append(j)
+            except KeyboardInterrupt:
+                raise
+            except BaseException as e:
+                outcomes[j] = ([x], i + 1)
+        pending = still_pending
+        if len(pending) == 0:
+            break
+    return outcomes
+
+
+# run a single mutant combination and build its result record
+# if examples (a seed's corpus) is given, they are replayed instead of running hypothesis (see replay_corpus for reached)
+def run_job(testing_module, job, test_settings={}, examples=None, reached=None):
+    test_module = job_module(testing_module, job)
+    if examples is None:
+        (fails, attempts) = run_test(test_module, **test_settings)
+    elif reached is None:
+        (fails, attempts) = replay_corpus(test_module, examples)
+    else:
+        (fails, attempts) = replay_corpus(test_module, examples, reached, tracing_mask(job))
+    return job_record(testing_module, job, fails, attempts)
+
+
+# build a combination's result record from what running it gave, triaging the failure if there is one
+def job_record(testing_module, job, fails, attempts):
+    if len(fails) > 0:
+        fail = fails[-1]
+        pickled = pickle.dumps(fail)
+        triage = [list(x) for x in triage_mutants(testing_module, job, fail, input_hash(fail, pickled))]
+        return {
+            "type": "fail",
+            "attempts": attempts,
+            "fail": b64encode(pickled).decode("utf8"),
+            "triage": triage,
+            "fail_repr": repr(fail),
+        }
+    else:
+        return {
+            "type": "nofail",
+            "attempts": attempts
+        }
+
+
+# long-lived worker: builds its testing module once, then receives (job id, seed, combos) jobs on its own job pipe
+# until it gets a None sentinel, sending the results of each job back on its own result pipe as soon as it is done
+# with a corpus_directory, combinations are run on the seed's corpus from there,
+# and with example_major in one run_example_major pass per job. skip_unreached applies to corpus runs
+# progress is where the worker tells the pool's watchdog which job it is on and since when (see start_worker)
+def run_jobs(thread_name, job_conn, result_conn, test_settings={}, corpus_directory=None, example_major=False, progress=None):
+    global worker_progress
+    worker_progress = progress
+    testing_module = worker_module()
+    result_conn.send(("ready", thread_name))
+    while True:
+        job = job_conn.recv()
+        if job is None:
+            break
+        (job_id, seed_to_use, combos) = job
+        if progress is not None:
+            progress.job_start.value = progress.example_start.value = time.monotonic()
+            progress.attempts.value = 0
+            progress.job.value = job_id
+        examples = None if corpus_directory is None else load_corpus(corpus_directory, seed_to_use)
+        reached = corpus_reachability(corpus_directory, seed_to_use) if skip_unreached and examples is not None else None
+        # loading and tracing the corpus happens once per seed, and isn't counted against the job's time
+        if progress is not None:
+            progress.job_start.value = progress.example_start.value = time.monotonic()
+        if example_major:
+            outcomes = run_example_major(testing_module, combos, examples, reached)
+            res = [job_record(testing_module, combo, *outcome) for (combo, outcome) in zip(combos, outcomes)]
         else:
-            data[k] = {
-                "type": "nofail",
-                "attempts": attempts
-            }
-        if pbar is not None:
-            pbar.update()
-    data_queue.put(data)
-
-
-# allocates mutant combinations across multiple threads then runs them
-def run_combos(combos, nthreads=3, test_settings={}, pbar_offset=0):
-    data_queue = Queue()
-    jobs = [[] for _ in range(nthreads)]
-    muts = default_mg.all_mutants
-    # pre-distribute runs for the seed across the threads so they only communicate when finishing all their runs
-    for (i, combo) in enumerate(itertools.combinations(muts, combos)):
-        jobs[i % nthreads].append(set(combo))
-    pbars = [
-        tqdm(total=len(x), position=i + pbar_offset, leave=False)
-        for (i, x) in enumerate(jobs)
-    ]
-    threads = []
-    for (i, (job, pbar)) in enumerate(zip(jobs, pbars)):
-        thread = Process(
-            target=run_jobs,
-            args=(job, data_queue),
-            kwargs={"test_settings": test_settings, "pbar": pbar, "thread_name": i},
-        )
-        pbar.set_description(f"thread {i}")
-        threads.append(thread)
-    for thread in threads:
-        thread.start()
-    data = {}
-    for _ in range(nthreads):
-        data.update(data_queue.get())
-    for thread in threads:
+            res = [
+                run_job(testing_module, combo, {**test_settings, "seed_to_use": seed_to_use}, examples, reached)
+                for combo in combos
+            ]
+        # the job stays marked until its result is sent, so a worker that dies sending it is put down to the job
+        result_conn.send(("result", (job_id, seed_to_use, ["|".join(x) for x in combos], res)))
+        if progress is not None:
+            progress.job.value = -1
+
+
+# start (or replace) the pool's i-th worker, with a new pair of pipes
+# every worker has its own pipes, and nothing else writes to or reads from them, so killing a worker at any point
+# (even halfway through a send) can't leave anything the other workers use locked or corrupted
+def start_worker(pool, i):
+    progress = SimpleNamespace(
+        job=pool.context.RawValue("q", -1),
+        job_start=pool.context.RawValue("d", 0.0),
+        example_start=pool.context.RawValue("d", 0.0),
+        attempts=pool.context.RawValue("q", 0),
+    )
+    (job_recv, job_send) = pool.context.Pipe(duplex=False)
+    (result_recv, result_send) = pool.context.Pipe(duplex=False)
+    thread = pool.context.Process(
+        target=run_jobs,
+        args=(i, job_recv, result_send),
+        kwargs={**pool.worker_kwargs, "progress": progress},
+    )
+    thread.start()
+    # the worker has its own copies of these ends
+    job_recv.close()
+    result_send.close()
+    worker = (thread, progress, job_send, result_recv, [])
+    if i < len(pool.threads):
+        (pool.threads[i], pool.progress[i], pool.job_conns[i], pool.result_conns[i], pool.assigned[i]) = worker
+    else:
+        for (workers, x) in zip((pool.threads, pool.progress, pool.job_conns, pool.result_conns, pool.assigned), worker):
+            workers.append(x)
+
+
+# starts a pool of workers that is reused for every seed
+# startup_time is the wall-clock time from launching the first worker to the last one being ready
+# assigned[i] lists the ids of the jobs sent to worker i that haven't come back yet, oldest first
+def start_pool(nthreads=3, test_settings={}, corpus_directory=None, example_major=False):
+    context = get_context(start_method)
+    prepare_workers(context)
+    pool = SimpleNamespace(
+        context=context,
+        threads=[],
+        progress=[],
+        job_conns=[],
+        result_conns=[],
+        assigned=[],
+        worker_kwargs={"test_settings": test_settings, "corpus_directory": corpus_directory, "example_major": example_major},
+        startup_time=0.0,
+        restarts=0,
+    )
+    started = time.perf_counter()
+    for i in range(nthreads):
+        start_worker(pool, i)
+    for conn in pool.result_conns:
+        (kind, _) = conn.recv()
+        assert kind == "ready"
+    pool.startup_time = time.perf_counter() - started
+    return pool
+
+
+def stop_pool(pool):
+    for conn in pool.job_conns:
+        conn.send(None)
+    for thread in pool.threads:
         thread.join()
-    for pbar in pbars:
-        pbar.close()
-    return data
+    for conn in pool.job_conns + pool.result_conns:
+        conn.close()
+
+
+# kill the pool's i-th worker and start a new one in its place, returning the ids of the jobs it had been sent
+def restart_worker(pool, i):
+    assigned = pool.assigned[i]
+    pool.threads[i].kill()
+    pool.threads[i].join()
+    pool.job_conns[i].close()
+    pool.result_conns[i].close()
+    start_worker(pool, i)
+    pool.restarts += 1
+    return assigned
+
+
+# replace the pool's i-th worker, killing it if it is still running. returns the (job id, attempts, exit code) of
+# the job it was on, if any, and the ids of the other jobs it had been sent, which it hadn't started. the exit code
+# is None if the worker was still running (the watchdog stopped the job), and otherwise the one it died with
+def stop_worker(pool, i):
+    progress = pool.progress[i]
+    (job_id, attempts) = (progress.job.value, progress.attempts.value)
+    exitcode = pool.threads[i].exitcode
+    # if the job finishes before the kill, its result is lost with the worker's pipe and it stays stopped.
+    # a worker that died between jobs wasn't on any of them, so they are all handed out again
+    assigned = restart_worker(pool, i)
+    stopped = [(job_id, attempts, exitcode)] if job_id in assigned else []
+    return (stopped, [x for x in assigned if x != job_id])
+
+
+# kill and replace every worker that has been on its job for longer than job_timeout per combination or on one run
+# of testing_function for longer than example_timeout, and replace every worker that has died. returns what
+# stop_worker does for all of them together. jobs maps the id of every job that was handed out and hasn't come
+# back yet to its (seed, combos)
+def stop_hung_workers(pool, jobs):
+    (stopped, unstarted) = ([], [])
+    now = time.monotonic()
+    for (i, progress) in enumerate(pool.progress):
+        if pool.threads[i].is_alive():
+            job_id = progress.job.value
+            if job_id not in pool.assigned[i]:
+                continue
+            ncombos_in_job = len(jobs[job_id][1])
+            if (
+                (job_timeout is None or now - progress.job_start.value <= job_timeout * ncombos_in_job)
+                and (example_timeout is None or now - progress.example_start.value <= example_timeout)
+            ):
+                continue
+        (worker_stopped, worker_unstarted) = stop_worker(pool, i)
+        stopped += worker_stopped
+        unstarted += worker_unstarted
+    return (stopped, unstarted)
+
+
+# hands every (seed, combo) pair to the pool as one job stream, so the last combinations of one seed
+# overlap with the first of the next instead of leaving threads idle
+# seed_combos maps each seed to the combinations to run for it, and each job is up to per_job of a seed's combinations
+# job_done(seed, combo, result) is called for every result as it comes back,
+# and seed_done(seed) as soon as all of a seed's combinations are finished
+# jobs that hang are stopped by the watchdog (see stop_hung_workers): a single combination is reported with a
+# "timeout" result, and the combinations of a bigger job are handed out again one per job. jobs whose worker dies
+# are split up the same way, and a single combination that crashes its worker is reported with
+# job_crashed(seed, combo, exit code) instead. it has no result, so its seed is never finished
+def run_seeds(pool, seed_combos, job_done, seed_done, job_crashed, pbar_offset=0, per_job=1):
+    job_ids = itertools.count()
+    jobs = (
+        (next(job_ids), seed_to_use, [set(x) for x in combos[i:i + per_job]])
+        for (seed_to_use, combos) in seed_combos.items()
+        for i in range(0, len(combos), per_job)
+    )
+    retries = []
+    in_flight = {}
+
+    # each worker is kept jobs_per_worker jobs ahead, so it has its next job as soon as it finishes one
+    # and the stream is generated lazily. jobs go to whichever worker sends back a result, so slow jobs
+    # don't hold up the others
+    jobs_per_worker = 2
+
+    def hand_out(i):
+        while len(pool.assigned[i]) < jobs_per_worker:
+            job = retries.pop(0) if len(retries) > 0 else next(jobs, None)
+            if job is None:
+                return
+            try:
+                pool.job_conns[i].send(job)
+            except BrokenPipeError:
+                # the worker died since the watchdog last looked, so it is replaced now and the job goes to the new one
+                retries.insert(0, job)
+                handle_stopped(*stop_worker(pool, i))
+                continue
+            pool.assigned[i].append(job[0])
+            in_flight[job[0]] = job[1:]
+
+    remaining = {seed_to_use: len(combos) for (seed_to_use, combos) in seed_combos.items()}
+    for (seed_to_use, n) in list(remaining.items()):
+        if n == 0:
+            del remaining[seed_to_use]
+            seed_done(seed_to_use)
+
+    def finish(seed_to_use, keys, job_results):
+        pbar.set_description(f"seed {seed_to_use} ({keys[-1]})")
+        pbar.update(len(keys))
+        for (k, res) in zip(keys, job_results):
+            job_done(seed_to_use, k.split("|"), res)
+        remaining[seed_to_use] -= len(keys)
+        if remaining[seed_to_use] == 0:
+            del remaining[seed_to_use]
+            seed_done(seed_to_use)
+
+    # hand out the jobs of workers that were stopped (see stop_worker) again, or report them
+    def handle_stopped(stopped, unstarted):
+        retries[:0] = [(job_id, *in_flight.pop(job_id)) for job_id in unstarted]
+        for (job_id, attempts, exitcode) in stopped:
+            (seed_to_use, combos) = in_flight.pop(job_id)
+            if len(combos) > 1:
+                retries.extend((next(job_ids), seed_to_use, [x]) for x in combos)
+            elif exitcode is None:
+                finish(seed_to_use, ["|".join(combos[0])], [{"type": "timeout", "attempts": attempts}])
+            else:
+                pbar.update(1)
+                job_crashed(seed_to_use, sorted(combos[0]), exitcode)
+
+    # how often the watchdog looks at the workers when no results are coming back
+    timeouts = [x for x in (job_timeout, example_timeout) if x is not None]
+    poll_interval = min(timeouts + [60]) / 4
+    with tqdm(total=sum(remaining.values()), position=pbar_offset, leave=False) as pbar:
+        for i in range(len(pool.threads)):
+            hand_out(i)
+        while len(in_flight) > 0:
+            for conn in wait(pool.result_conns, timeout=poll_interval):
+                i = pool.result_conns.index(conn)
+                try:
+                    (kind, message) = conn.recv()
+                except EOFError:
+                    # the worker died, the watchdog replaces it below
+                    continue
+                # replaced workers say they're ready too
+                if kind == "result":
+                    (job_id, seed_to_use, keys, job_results) = message
+                    pool.assigned[i].remove(job_id)
+                    in_flight.pop(job_id)
+                    hand_out(i)
+                    finish(seed_to_use, keys, job_results)
+            handle_stopped(*stop_hung_workers(pool, in_flight))
+            for i in range(len(pool.threads)):
+                hand_out(i)
 
 
 if __name__ == "__main__":
-    total_data = {}
-    total_pbar = tqdm(range(1, nseeds + 1), position=0)
-    total_pbar.set_description("overall")
     db = plyvel.DB(f"{filename}_ldb", create_if_missing=True)
+    if results.has_json_records(db):
+        print(f"{filename}_ldb still has json results, `python results.py {filename}_ldb` converts them (reading them works either way)")
     override = (input("Override existing results? [y/N] ").strip().lower() or "n")[0] == "y"
-    for seed_to_use in total_pbar:
-        key = str(seed_to_use).encode("utf8")
-        if not override:
-            existing = db.get(key)
-            if existing is not None:
-                total_data[seed_to_use] = json.loads(existing.decode("utf8"))
-                continue
-        res = run_combos(
-            ncombos,
-            test_settings={
-                "phase": (without_shrink, with_shrink)[to_shrink],
-                "examples": 500,
-                "seed_to_use": seed_to_use,
-            },
-            nthreads=max(cpu_count() - 1, 1),
-            pbar_offset=1,
-        )
-        total_data[seed_to_use] = res
-        db.put(str(seed_to_use).encode("utf8"), json.dumps(res, sort_keys=True).encode("utf8"))
-    db.close()
+    combo_list = list(itertools.combinations(default_mg.all_mutants, ncombos))
+    mutant_table = results.register_mutants(db, default_mg.all_mutants)
+    # pick up where an interrupted run left off: finished seeds are skipped entirely,
+    # and unfinished ones only run the combinations that don't have a result yet
+    seed_combos = {}
+    skipped_combos = 0
+    for seed_to_use in range(1, nseeds + 1):
+        if override:
+            results.clear_seed(db, seed_to_use)
+        elif results.is_seed_done(db, seed_to_use):
+            continue
+        completed = results.completed_combos(db, seed_to_use)
+        seed_combos[seed_to_use] = [x for x in combo_list if results.combo_key(x) not in completed]
+        skipped_combos += len(combo_list) - len(seed_combos[seed_to_use])
+    if skipped_combos > 0:
+        print(f"resuming: {skipped_combos} combinations already have results")
+    nthreads = max(cpu_count() - 1, 1)
+    corpus_directory = None
+    example_major = evaluation_order == "example" and use_corpus and not to_shrink
+    if evaluation_order == "example" and not example_major:
+        print("evaluation_order = \"example\" needs use_corpus (and an unshrunk run), testing one combination at a time")
+    if skip_unreached and not (use_corpus and not to_shrink):
+        print("skip_unreached needs use_corpus (and an unshrunk run), running every example")
+    if use_corpus and to_shrink:
+        print("use_corpus is only used for unshrunk runs, running hypothesis for every combination")
+    elif use_corpus:
+        corpus_directory = module_corpus_dir(500)
+        missing = [x for x in seed_combos if not corpus.has_corpus(corpus_directory, x)]
+        # the corpus pool starts the forkserver, if there is one, so it has to know what to preload already
+        prepare_workers(get_context(start_method))
+        # each seed's examples are generated once, in parallel, before any combination runs
+        with get_context(start_method).Pool(nthreads) as corpus_pool:
+            jobs = corpus_pool.imap_unordered(partial(generate_corpus, corpus_directory), missing)
+            for _ in tqdm(jobs, total=len(missing), desc="corpus"):
+                pass
+    pool = start_pool(
+        nthreads=nthreads,
+        test_settings={
+            "phase": (without_shrink, with_shrink)[to_shrink],
+            "examples": 500,
+        },
+        corpus_directory=corpus_directory,
+        example_major=example_major,
+    )
+    total_pbar = tqdm(total=nseeds, initial=nseeds - len(seed_combos), position=0)
+    total_pbar.set_description("overall")
+
+    # every result goes to the store as soon as it arrives, so the parent doesn't hold on to it
+    # and an interrupted run only loses the jobs that were in flight
+    timed_out = []
+    crashed = []
+
+    def job_done(seed_to_use, combo, res):
+        if res["type"] == "timeout":
+            timed_out.append((seed_to_use, results.combo_key(combo)))
+        results.put_result(db, seed_to_use, combo, res, mutant_table)
+
+    def job_crashed(seed_to_use, combo, exitcode):
+        crashed.append((seed_to_use, results.combo_key(combo), exitcode))
+
+    def seed_done(seed_to_use):
+        results.mark_seed_done(db, seed_to_use, len(combo_list))
+        total_pbar.update()
+
+    run_seeds(pool, seed_combos, job_done, seed_done, job_crashed, pbar_offset=1, per_job=combinations_per_job if example_major else 1)
+    total_pbar.close()
+    stop_pool(pool)
+    if len(timed_out) > 0 or pool.restarts > 0:
+        print(f"{len(timed_out)} jobs timed out and were stored as \"timeout\" results ({pool.restarts} workers restarted):")
+        for (seed_to_use, k) in timed_out:
+            print(f"  seed {seed_to_use}: {k}")
+    if len(crashed) > 0:
+        print(f"{len(crashed)} jobs crashed their worker and have no result (their seeds are left unfinished):")
+        for (seed_to_use, k, exitcode) in crashed:
+            print(f"  seed {seed_to_use}: {k} (exit code {exitcode})")
+    # write the json copy one seed at a time instead of loading every record at once
     with open(filename + ".json", "w") as f:
-        json.dump(total_data, f, sort_keys=True)
+        f.write("{")
+        for seed_to_use in range(1, nseeds + 1):
+            res = results.read_seed(db, seed_to_use)
+            if res is not None:
+                f.write(("" if f.tell() == 1 else ", ") + json.dumps(str(seed_to_use)) + ": " + json.dumps(res, sort_keys=True))
+        f.write("}")
+    db.close()
+    print(f"worker startup: {pool.startup_time:.2f}s for {len(pool.threads)} workers, {pool.restarts} restarted")
@@ -2,6 +2,8 @@ import plyvel
 
 import plyvel
 import json
+import results
+import columns
 from tqdm import tqdm
 import matplotlib.pyplot as plt
 import itertools
@@ -12,13 +14,8 @@ names = {1: "single", 2: "double", 3: "triple", 4: "quadruple"}
 
 modname = "avltree"
 
-def rearrange_keys(d):
-    ret = {}
-    for k in d:
-        if modname == "toml" and any(x in k for x in ("BAD_CIRCULAR_REF_CHECK", "STR_NO_LEADING_DOT")):
-            continue
-        ret["|".join(sorted(k.split("|")))] = d[k]
-    return ret
+# runs with any of the mutants the module lists in excluded_mutants are left out
+excluded = columns.excluded_mutants(modname)
 
 for ncombos in range(1, 4):
     unshrunk_db = plyvel.DB(
@@ -28,12 +25,14 @@ for ncombos in range(1, 4):
         f"data/{modname}_{names.get(ncombos, 'x' + str(ncombos))}_shrunk_ldb"
     )
     for seed in tqdm(range(1, 101)):
-        key = str(seed).encode("utf8")
-        unshrunk_data = rearrange_keys(json.loads(unshrunk_db.get(key)))
-        shrunk_data = rearrange_keys(json.loads(shrunk_db.get(key)))
+        unshrunk_data = results.read_seed(unshrunk_db, seed, with_inputs=False, excluded=excluded)
+        shrunk_data = results.read_seed(shrunk_db, seed, with_inputs=False, excluded=excluded)
         for k in unshrunk_data:
             unshrunk_entry = unshrunk_data[k]
             shrunk_entry = shrunk_data[k]
+            # jobs the runner stopped have no outcome to compare
+            if "timeout" in (unshrunk_entry["type"], shrunk_entry["type"]):
+                continue
             if not (
                 unshrunk_entry["type"] == shrunk_entry["type"]
                 and (unshrunk_entry["type"] == "nofail" or unshrunk_entry["attempts"] == shrunk_entry["attempts"])
@@ -19,6 +19,8 @@ def quicksort(l):
 from hypothesis import strategies as st
 
 testing_strategy = st.lists(st.integers())
+# quicksort builds new lists, so the input is never modified
+testing_mutates_input = False
 
 def testing_function(l):
     sorted_list = quicksort(l)
@@ -4,12 +4,7 @@ from base64 import b64encode
 import plyvel
 from copy import deepcopy
 import json
-
-def rearrange_keys(d):
-    ret = {}
-    for k in d:
-        ret["|".join(sorted(k.split("|")))] = d[k]
-    return ret
+import results
 
 new_runner.modname = "toml"
 new_runner.to_shrink = True
@@ -24,9 +19,8 @@ mod.mg.current_mutants = deepcopy(job)
 assert len(mod.mg.current_mutants) == new_runner.ncombos
 phase = (new_runner.without_shrink, new_runner.with_shrink)[new_runner.to_shrink]
 db = plyvel.DB(f"{new_runner.filename}_ldb", create_if_missing=False)
-key = str(seed_to_use).encode("utf8")
 (fails, attempts) = new_runner.run_test(mod, seed_to_use, phase, 500)
-entry = rearrange_keys(json.loads(db.get(key)))
+entry = results.read_seed(db, seed_to_use)
 if len(fails) > 0:
     fail = fails[-1]
     triage = [list(x) for x in new_runner.triage_failure(mod, job, fail)]
@@ -42,7 +36,6 @@ else:
         "type": "nofail",
         "attempts": attempts
     }
-if entry[damaged_key] == data:
+if entry[results.combo_key(job)] == data:
     print("unchanged")
-entry[damaged_key] = data
-db.put(key, json.dumps(entry).encode("utf8"))
+results.put_result(db, seed_to_use, job, data)
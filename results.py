@@ -0,0 +1,390 @@
+# reading and writing the result stores in data/
+#
+# every (seed, combination) result is its own key, bin/<seed>/<combination mask>, holding a packed binary record
+# (see encode_record). mutants are numbered by the table stored under meta/mutants, so a combination or a triage
+# cause is a bitmask of mutant ids, and failing inputs are stored once per distinct input under input/<sha256 prefix>.
+# done/<seed> is written once every combination of a seed is in, and meta/version counts the writes to the store
+# while meta/store_id is a random id given to it on its first write, so anything derived from a store can tell
+# whether it has changed since, or has been deleted and written again (see store_fingerprint).
+#
+# older stores hold json records instead, either one per combination under combo/<seed>/<sorted combo>, or one
+# per seed under the key <seed>. read_seed handles all three, and convert_store rewrites them in the binary format
+import json
+import hashlib
+import struct
+import sys
+import uuid
+from base64 import b64decode, b64encode
+
+# record header: result type, attempts, number of triage causes (capped at max_header_causes, since exhaustive
+# triage of a big combination can find more; the masks run to the end of the record, so they're counted from that)
+record_header = struct.Struct("<BHB")
+max_header_causes = 255
+# "timeout" records are jobs the runner stopped (see job_timeout in new_runner.py), with attempts the number of
+# examples they had started
+record_types = ["nofail", "fail", "timeout"]
+# combination and triage masks are stored as unsigned 64 bit ints
+mask_format = struct.Struct("<Q")
+max_mutants = 64
+# failing inputs are referred to by the first 8 bytes of the sha256 of their pickle
+digest_size = 8
+# side table value: length of the pickled input, then the pickled input and its repr
+input_header = struct.Struct("<I")
+
+
+def combo_key(combo):
+    """ Canonical name of a mutant combination, e.g. {"B", "A"} -> "A|B" """
+    return "|".join(sorted(combo))
+
+
+def seed_prefix(seed):
+    return f"bin/{seed}/".encode("utf8")
+
+
+def json_seed_prefix(seed):
+    return f"combo/{seed}/".encode("utf8")
+
+
+def done_key(seed):
+    return f"done/{seed}".encode("utf8")
+
+
+def legacy_key(seed):
+    return str(seed).encode("utf8")
+
+
+def input_key(digest):
+    return b"input/" + digest.hex().encode("utf8")
+
+
+mutants_key = b"meta/mutants"
+# the keys json records can be under: per-seed records are the keys made of digits, which sort between "0" and ":"
+json_key_ranges = ({"start": b"0", "stop": b":"}, {"prefix": b"combo/"})
+version_key = b"meta/version"
+store_id_key = b"meta/store_id"
+
+
+def mutant_table(db):
+    """ The store's mutant names, indexed by mutant id """
+    table = db.get(mutants_key)
+    return [] if table is None else json.loads(table)
+
+
+def register_mutants(db, mutants):
+    """ Add any mutants missing from the store's table, keeping the ids of the ones already in it, and return the table """
+    table = mutant_table(db)
+    new = [x for x in mutants if x not in table]
+    if len(new) > 0:
+        table += new
+        if len(table) > max_mutants:
+            raise ValueError(f"at most {max_mutants} mutants fit in a combination mask, got {len(table)}")
+        with db.write_batch() as wb:
+            wb.put(mutants_key, json.dumps(table).encode("utf8"))
+            bump_version(db, wb)
+    return table
+
+
+def store_version(db):
+    version = db.get(version_key)
+    return 0 if version is None else int(version)
+
+
+def bump_version(db, wb):
+    """ Count a write to the store, as part of the write batch wb that makes it (giving the store its id if it has none) """
+    if db.get(store_id_key) is None:
+        wb.put(store_id_key, uuid.uuid4().hex.encode("utf8"))
+    wb.put(version_key, str(store_version(db) + 1).encode("utf8"))
+
+
+def store_fingerprint(db):
+    """
+    A string that changes whenever the store is written to, and differs between a store and one written again
+    in its place. json records are written without counting the write, so stores that still have them are also
+    fingerprinted by hashing those records
+    """
+    store_id = db.get(store_id_key)
+    fingerprint = "v" + str(store_version(db))
+    if store_id is not None:
+        fingerprint = store_id.decode("utf8") + "/" + fingerprint
+    if has_json_records(db):
+        digest = hashlib.sha256()
+        for key_range in json_key_ranges:
+            for (key, value) in db.iterator(**key_range):
+                digest.update(struct.pack("<II", len(key), len(value)) + key + value)
+        fingerprint += "/sha256:" + digest.hexdigest()
+    return fingerprint
+
+
+def to_mask(table, mutants):
+    ids = {x: i for (i, x) in enumerate(table)}
+    mask = 0
+    for x in mutants:
+        mask |= 1 << ids[x]
+    return mask
+
+
+def from_mask(table, mask):
+    names = []
+    # walk the set bits from lowest to highest
+    while mask:
+        low = mask & -mask
+        names.append(table[low.bit_length() - 1])
+        mask ^= low
+    return names
+
+
+def encode_record(table, res):
+    """
+    Pack a result record as it comes out of the runner into bytes, returning (record, input digest, input entry)
+
+    The record is record_header followed, for failures, by the sha256 of the pickled failing input and one
+    mask per triage cause. The input entry is the side table value for the digest (None for other records).
+    """
+    triage = res.get("triage", [])
+    record = record_header.pack(record_types.index(res["type"]), res["attempts"], min(len(triage), max_header_causes))
+    if res["type"] != "fail":
+        return (record, None, None)
+    pickled = b64decode(res["fail"])
+    digest = hashlib.sha256(pickled).digest()[:digest_size]
+    record += digest + b"".join(mask_format.pack(to_mask(table, x)) for x in triage)
+    entry = input_header.pack(len(pickled)) + pickled + res.get("fail_repr", "").encode("utf8")
+    return (record, digest, entry)
+
+
+def decode_record(table, record):
+    """
+    Unpack a record into (type, attempts, triage masks, input digest), the digest being None unless it is a failure
+    """
+    (rtype, attempts, _) = record_header.unpack_from(record)
+    if record_types[rtype] != "fail":
+        return (record_types[rtype], attempts, [], None)
+    start = record_header.size + digest_size
+    digest = record[record_header.size:start]
+    triage = [x for (x,) in mask_format.iter_unpack(record[start:])]
+    return (record_types[rtype], attempts, triage, digest)
+
+
+def read_input(db, digest):
+    """ Return (pickled input, repr) of a stored failing input """
+    entry = db.get(input_key(digest))
+    (size,) = input_header.unpack_from(entry)
+    start = input_header.size
+    return (entry[start:start + size], entry[start + size:].decode("utf8"))
+
+
+def record_dict(db, table, record, with_inputs=True):
+    """ The json-style dict of a binary record, as the runner produces it """
+    (rtype, attempts, triage, digest) = decode_record(table, record)
+    res = {"type": rtype, "attempts": attempts}
+    if rtype == "fail":
+        res["triage"] = [from_mask(table, x) for x in triage]
+        if with_inputs:
+            (pickled, fail_repr) = read_input(db, digest)
+            res["fail"] = b64encode(pickled).decode("utf8")
+            res["fail_repr"] = fail_repr
+    return res
+
+
+def put_result(db, seed, combo, res, table=None):
+    """ Store the result record of one (seed, combination) pair """
+    if table is None or not set(combo).issubset(table):
+        table = register_mutants(db, sorted(combo))
+    (record, digest, entry) = encode_record(table, res)
+    with db.write_batch() as wb:
+        # the same failing input usually turns up in many combinations, so only write it the first time
+        if digest is not None and db.get(input_key(digest)) is None:
+            wb.put(input_key(digest), entry)
+        wb.put(seed_prefix(seed) + mask_format.pack(to_mask(table, combo)), record)
+        bump_version(db, wb)
+
+
+def mark_seed_done(db, seed, ncombos):
+    """ Record that all ncombos combinations of a seed have been run """
+    with db.write_batch() as wb:
+        wb.put(done_key(seed), str(ncombos).encode("utf8"))
+        bump_version(db, wb)
+
+
+def is_seed_done(db, seed):
+    return db.get(done_key(seed)) is not None or db.get(legacy_key(seed)) is not None
+
+
+def iter_records(db, seed):
+    """ Yield (combination mask, record bytes) for every binary record of a seed """
+    prefix = seed_prefix(seed)
+    for (key, value) in db.iterator(prefix=prefix):
+        yield (mask_format.unpack(key[len(prefix):])[0], value)
+
+
+def completed_combos(db, seed):
+    """ Set of the canonical names of the combinations that already have a result for a seed """
+    table = mutant_table(db)
+    prefix = json_seed_prefix(seed)
+    return {
+        combo_key(from_mask(table, mask)) for (mask, _) in iter_records(db, seed)
+    } | {
+        key[len(prefix):].decode("utf8")
+        for key in db.iterator(prefix=prefix, include_value=False)
+    }
+
+
+def clear_seed(db, seed):
+    """
+    Delete everything stored for a seed. Failing inputs are left in the side table, since other seeds may
+    share them
+    """
+    with db.write_batch(transaction=True) as wb:
+        for prefix in (seed_prefix(seed), json_seed_prefix(seed)):
+            for key in db.iterator(prefix=prefix, include_value=False):
+                wb.delete(key)
+        wb.delete(done_key(seed))
+        wb.delete(legacy_key(seed))
+        bump_version(db, wb)
+
+
+def read_json_records(db, seed):
+    """ A seed's records from before the binary format: the per-seed record and the json per-combination ones """
+    legacy = db.get(legacy_key(seed))
+    # the per-seed records name combinations in whatever order the mutants came out of a set
+    res = {} if legacy is None else {combo_key(k.split("|")): v for (k, v) in json.loads(legacy).items()}
+    prefix = json_seed_prefix(seed)
+    # results stored per combination (e.g. by repair.py) take precedence over the old per-seed record
+    for (key, value) in db.iterator(prefix=prefix):
+        res[key[len(prefix):].decode("utf8")] = json.loads(value)
+    return res
+
+
+def read_seed(db, seed, with_inputs=True, excluded=()):
+    """
+    Seed-level view of a store: a dict from canonical combination name (see combo_key) to result record, like the
+    per-seed records older stores have. Returns None if nothing is stored for the seed.
+
+    With with_inputs=False the "fail" and "fail_repr" fields are left out, which skips the side table lookups.
+    Combinations with any of the excluded mutants (e.g. a module's excluded_mutants) are left out.
+    """
+    table = mutant_table(db)
+    excluded_mask = to_mask(table, [x for x in excluded if x in table])
+    records = {
+        combo_key(from_mask(table, mask)): record_dict(db, table, record, with_inputs)
+        for (mask, record) in iter_records(db, seed)
+        if mask & excluded_mask == 0
+    }
+    res = read_json_records(db, seed)
+    if len(res) == 0:
+        return records if len(records) > 0 or is_seed_done(db, seed) else None
+    if len(excluded) > 0:
+        res = {k: v for (k, v) in res.items() if not set(k.split("|")) & set(excluded)}
+    res.update(records)
+    return res
+
+
+def read_seed_index(db, seed, table):
+    """
+    Mask-level view of a seed: a dict from combination mask to (combination mask, type, attempts, triage masks),
+    with masks numbered by table, so looking up a mutant set needs no string handling. Mutants of json records
+    that aren't in table yet are appended to it (in memory only). Like read_seed, binary records take precedence
+    over json ones for the same combination
+    """
+    store_table = mutant_table(db)
+    table += [x for x in store_table if x not in table]
+    # bit i of the store's masks is bit bits[i] of table's
+    bits = [1 << table.index(x) for x in store_table]
+    same_ids = all(bit == 1 << i for (i, bit) in enumerate(bits))
+
+    def remap(mask):
+        if same_ids:
+            return mask
+        new = 0
+        while mask:
+            low = mask & -mask
+            new |= bits[low.bit_length() - 1]
+            mask ^= low
+        return new
+
+    res = {}
+    for (mask, record) in iter_records(db, seed):
+        (rtype, attempts, triage, _) = decode_record(store_table, record)
+        mask = remap(mask)
+        res[mask] = (mask, rtype, attempts, [remap(x) for x in triage])
+    for (k, v) in read_json_records(db, seed).items():
+        combo = k.split("|")
+        table += sorted({x for x in combo + [y for cause in v.get("triage", []) for y in cause] if x not in table})
+        mask = to_mask(table, combo)
+        if mask not in res:
+            res[mask] = (mask, v["type"], v["attempts"], [to_mask(table, x) for x in v.get("triage", [])])
+    return res
+
+
+def read_seed_masks(db, seed, table):
+    """ The records of read_seed_index as a list """
+    return list(read_seed_index(db, seed, table).values())
+
+
+def has_json_records(db):
+    """ Whether a store still has records from before the binary format (see convert_store) """
+    for key_range in json_key_ranges:
+        for key in db.iterator(include_value=False, **key_range):
+            return True
+    return False
+
+
+def stored_seeds(db):
+    """ Sorted list of the seeds that have anything stored """
+    seeds = set()
+    for key in db.iterator(include_value=False):
+        if key.isdigit():
+            seeds.add(int(key))
+        elif key.startswith((b"bin/", b"combo/", b"done/")):
+            seeds.add(int(key.split(b"/")[1]))
+    return sorted(seeds)
+
+
+def convert_store(src, dst, mutants=()):
+    """
+    Copy a store into an empty one, rewriting its json records in the binary format, and return the number of
+    records converted. mutants gives the id order of the mutant table if the store doesn't have one yet
+    (sorted names are used otherwise)
+    """
+    table = register_mutants(dst, mutant_table(src) + list(mutants))
+    seeds = stored_seeds(src)
+    with dst.write_batch() as wb:
+        for (key, value) in src:
+            # dst keeps its own mutant table, write count and store id
+            if not key.startswith(b"meta/") and not key.isdigit() and not key.startswith(b"combo/"):
+                wb.put(key, value)
+    converted = 0
+    for seed in seeds:
+        done = completed_combos(dst, seed)
+        res = {k: v for (k, v) in read_json_records(src, seed).items() if k not in done}
+        if len(res) == 0:
+            continue
+        table = register_mutants(dst, table + sorted({x for k in res for x in k.split("|")}))
+        for (k, v) in res.items():
+            put_result(dst, seed, k.split("|"), v, table)
+        # a per-seed record was only ever written once the whole seed was done
+        if src.get(legacy_key(seed)) is not None and src.get(done_key(seed)) is None:
+            mark_seed_done(dst, seed, len(res) + len(done))
+        converted += len(res)
+    return converted
+
+
+# convert existing stores: python results.py data/btree_double_unshrunk_ldb ...
+# each store is rewritten into a new directory that then takes its place, and the original is kept as <store>.json_backup
+if __name__ == "__main__":
+    import os
+    import plyvel
+
+    if len(sys.argv) < 2:
+        print(f"usage: python {sys.argv[0]} <store>...")
+        sys.exit(1)
+    for filename in sys.argv[1:]:
+        filename = filename.rstrip("/")
+        src = plyvel.DB(filename, create_if_missing=False)
+        dst = plyvel.DB(filename + ".converting", create_if_missing=True, error_if_exists=True)
+        converted = convert_store(src, dst)
+        dst.compact_range()
+        src.close()
+        dst.close()
+        os.rename(filename, filename + ".json_backup")
+        os.rename(filename + ".converting", filename)
+        print(f"{filename}: converted {converted} records, original kept in {filename}.json_backup")
@@ -0,0 +1,131 @@
+import ast
+import copy
+import types
+
+# the mutagen calls that get folded away, by method name
+mutant_sites = {"mut", "select", "active_mutant", "not_mutant"}
+
+
+def is_thunk(node):
+    """ Return True if node is a lambda that takes no arguments """
+    if not isinstance(node, ast.Lambda):
+        return False
+    args = node.args
+    return not (args.posonlyargs or args.args or args.vararg or args.kwonlyargs or args.kwarg)
+
+
+def site_mutant(node):
+    """ The mutant name of a mutant site MutantFolder would fold, or None if node isn't one """
+    if not isinstance(node, ast.Call):
+        return None
+    func = node.func
+    if not (
+        isinstance(func, ast.Attribute)
+        and isinstance(func.value, ast.Name)
+        and func.value.id == "mg"
+        and func.attr in mutant_sites
+        and not node.keywords
+        and len(node.args) > 0
+        and isinstance(node.args[0], ast.Constant)
+        and isinstance(node.args[0].value, str)
+    ):
+        return None
+    return node.args[0].value
+
+
+def site_mutants(nodes):
+    """ Set of the names of the mutants with a site anywhere in nodes """
+    return {x for node in nodes for child in ast.walk(node) for x in [site_mutant(child)] if x is not None}
+
+
+class MutantFolder(ast.NodeTransformer):
+    """
+    Rewrites every mg.mut / mg.select / mg.active_mutant / mg.not_mutant call with a literal mutant name into the
+    branch it would take for a fixed set of active mutants, e.g. with FOO active
+    `mg.mut("FOO", lambda: a, lambda: b)` becomes `b` and `mg.not_mutant("FOO")` becomes `False`.
+
+    Calls that don't have this exact shape are left alone and still go through mg at runtime.
+    """
+
+    def __init__(self, active):
+        self.active = frozenset(active)
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        mutant = site_mutant(node)
+        if mutant is None:
+            return node
+        func = node.func
+        active = mutant in self.active
+        if func.attr == "active_mutant" and len(node.args) == 1:
+            new = ast.Constant(active)
+        elif func.attr == "not_mutant" and len(node.args) == 1:
+            new = ast.Constant(not active)
+        elif func.attr == "mut" and len(node.args) == 3 and all(is_thunk(x) for x in node.args[1:]):
+            new = node.args[2 if active else 1].body
+        elif func.attr == "select" and len(node.args) == 3:
+            new = node.args[2 if active else 1]
+        else:
+            return node
+        return ast.copy_location(new, node)
+
+
+def specialize(source, filename, active):
+    """
+    Compile a subject module with every mutant site constant-folded for the given active mutants
+
+    Inputs:
+        * source [string | bytes] the module source
+        * filename [string] the file name used in tracebacks
+        * active [iterable] the names of the active mutants
+    """
+    tree = MutantFolder(active).visit(ast.parse(source, filename))
+    ast.fix_missing_locations(tree)
+    return compile(tree, filename, "exec")
+
+
+def module_functions(tree):
+    """
+    Find the functions of a parsed subject module whose code can be swapped for a specialized one (see
+    specialize_function) after the module is run: the functions defined at the top level of the module or directly
+    in a class that is. Returns (functions, elsewhere), functions being a list of (path, node, mutants) for them,
+    path the names of the enclosing classes followed by the function's and mutants the names of the mutants with
+    a site in its body, and elsewhere the names of the mutants with a site anywhere else (e.g. at the top level,
+    or in a default argument), which can only be folded by specializing the whole module
+    """
+    functions = []
+    elsewhere = set()
+
+    def visit(body, path):
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                functions.append((path + [node.name], node, frozenset(site_mutants(node.body))))
+                elsewhere.update(site_mutants(node.decorator_list + [node.args] + ([node.returns] if node.returns else [])))
+            elif isinstance(node, ast.ClassDef):
+                elsewhere.update(site_mutants(node.decorator_list + node.bases + node.keywords))
+                visit(node.body, path + [node.name])
+            else:
+                elsewhere.update(site_mutants([node]))
+
+    visit(tree.body, [])
+    return (functions, frozenset(elsewhere))
+
+
+def specialize_function(path, node, filename, active):
+    """
+    Compile one of the functions of module_functions with every mutant site in it folded for the given active
+    mutants, returning its code object. It is compiled inside classes of the same names as the ones it is in, so
+    the code is the same as the function's in the whole module (including the __class__ cell of methods)
+    """
+    tree = MutantFolder(active).visit(copy.deepcopy(node))
+    for name in reversed(path[:-1]):
+        fields = {"name": name, "bases": [], "keywords": [], "body": [tree], "decorator_list": []}
+        if "type_params" in ast.ClassDef._fields:
+            fields["type_params"] = []
+        tree = ast.copy_location(ast.ClassDef(**fields), node)
+    module = ast.Module(body=[tree], type_ignores=[])
+    ast.fix_missing_locations(module)
+    code = compile(module, filename, "exec")
+    for name in path:
+        code = next(x for x in code.co_consts if isinstance(x, types.CodeType) and x.co_name == name)
+    return code
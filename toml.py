@@ -1539,6 +1539,11 @@ def gen_value_strategies(inner):
 inner_strategy = st.deferred(lambda: st.one_of(*gen_value_strategies(inner_strategy)))
 # strategy = st.dictionaries(key_strategy, st.one_of(*all_strategies), max_size=3)
 testing_strategy = st.dictionaries(key_strategy, inner_strategy, max_size=hard_cap)
+# dumps/loads only read the input, so the runner doesn't need to copy it
+testing_mutates_input = False
+# runs with these mutants still happen, but are left out of the analysis
+# (read from this file by columns.excluded_mutants, so it has to stay a plain list of names)
+excluded_mutants = ["BAD_CIRCULAR_REF_CHECK", "STR_NO_LEADING_DOT"]
 
 def testing_function(x):
     res = structural_compare(x, loads(dumps(x)))